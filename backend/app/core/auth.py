@@ -2,50 +2,35 @@ from __future__ import annotations
 
 from typing import Any, Dict, Optional
 
+import hashlib
 import time
-import httpx
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt, jwk
+from jose import jwt
+from jose.backends.base import Key
 from jose.exceptions import JWTError
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.errors import bad_request, unauthorized
+from app.core.jwks import key_ring
+from app.core.metrics import ROLE_LOOKUPS, observe_upstream
+from app.core.profiling import profile_span
+from app.db.supabase_async import get_async_client
 
 bearer = HTTPBearer(auto_error=False)
 
-_JWKS_CACHE: dict[str, Any] | None = None
-_JWKS_FETCHED_AT: float | None = None
-_JWKS_TTL_SECONDS = 60 * 10
+# Verified claims keyed by sha256(token); entries live until min(exp, ttl).
+_TOKEN_CACHE = TTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+)
 
-
-def _jwks_url() -> str:
-    if not settings.SUPABASE_URL:
-        bad_request("SUPABASE_URL is not configured.")
-    return settings.SUPABASE_URL.rstrip("/") + "/auth/v1/.well-known/jwks.json"
-
-
-def _get_jwks(force_refresh: bool = False) -> dict[str, Any]:
-    global _JWKS_CACHE, _JWKS_FETCHED_AT
-
-    now = time.time()
-    if (
-        not force_refresh
-        and _JWKS_CACHE is not None
-        and _JWKS_FETCHED_AT is not None
-        and (now - _JWKS_FETCHED_AT) < _JWKS_TTL_SECONDS
-    ):
-        return _JWKS_CACHE
-
-    try:
-        with httpx.Client(timeout=10) as client:
-            r = client.get(_jwks_url())
-            r.raise_for_status()
-            _JWKS_CACHE = r.json()
-            _JWKS_FETCHED_AT = now
-            return _JWKS_CACHE
-    except Exception:
-        unauthorized("Unable to fetch JWKS.")
+# profiles.role per user id; staff routes invalidate entries they change.
+_ROLE_CACHE = TTLCache(
+    maxsize=settings.ROLE_CACHE_SIZE,
+    ttl=settings.ROLE_CACHE_TTL_SECONDS,
+)
 
 
 def _expected_issuer() -> str:
@@ -60,20 +45,42 @@ def _expected_audience() -> str:
     return settings.JWT_AUDIENCE
 
 
-def _select_jwk(jwks: dict[str, Any], kid: str) -> Optional[dict[str, Any]]:
-    keys = jwks.get("keys", [])
-    if not isinstance(keys, list):
-        return None
-    for k in keys:
-        if isinstance(k, dict) and k.get("kid") == kid:
-            return k
-    return None
+async def _get_signing_key(kid: str) -> Optional[tuple[str, Key]]:
+    await key_ring.ensure_loaded()
+    entry = key_ring.get(kid)
+
+    if entry is None:
+        entry = await key_ring.refresh_for_kid(kid)
+
+    return entry
+
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_cache_stats() -> dict[str, Any]:
+    return _TOKEN_CACHE.stats()
 
 
-def verify_supabase_jwt(token: str) -> Dict[str, Any]:
+async def verify_supabase_jwt(token: str) -> Dict[str, Any]:
     if not token:
         unauthorized("Missing Bearer token.")
 
+    cache_key = _token_cache_key(token)
+    cached = _TOKEN_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    with profile_span("jwt_verify"):
+        claims = await _verify_supabase_jwt_uncached(token)
+
+    exp = claims.get("exp")
+    _TOKEN_CACHE.set(cache_key, claims, expires_at=float(exp) if isinstance(exp, (int, float)) else None)
+    return claims
+
+
+async def _verify_supabase_jwt_uncached(token: str) -> Dict[str, Any]:
     try:
         header = jwt.get_unverified_header(token)
     except Exception:
@@ -87,23 +94,18 @@ def verify_supabase_jwt(token: str) -> Dict[str, Any]:
     if alg not in ("ES256", "RS256"):
         unauthorized(f"Unsupported JWT algorithm: {alg or 'unknown'}")
 
-    jwks = _get_jwks()
-    jwk_key = _select_jwk(jwks, kid)
-
-    if not jwk_key:
-        jwks = _get_jwks(force_refresh=True)
-        jwk_key = _select_jwk(jwks, kid)
-
-    if not jwk_key:
+    signing_key = await _get_signing_key(kid)
+    if not signing_key:
         unauthorized("Signing key not found for token (kid mismatch).")
 
-    try:
-        key_obj = jwk.construct(jwk_key, algorithm=alg)
-        public_pem = key_obj.to_pem().decode()
+    key_alg, key_obj = signing_key
+    if key_alg != alg:
+        unauthorized("Token algorithm does not match signing key.")
 
+    try:
         claims = jwt.decode(
             token,
-            public_pem,
+            key_obj,
             algorithms=[alg],
             issuer=_expected_issuer(),
             audience=_expected_audience(),
@@ -147,7 +149,7 @@ def _extract_role_from_claims(claims: Dict[str, Any]) -> Optional[str]:
     return None
 
 
-def _fetch_profile_role_via_rest(user_id: str, access_token: str) -> Optional[str]:
+async def _fetch_profile_role_via_rest(user_id: str, access_token: str) -> Optional[str]:
     if not settings.SUPABASE_URL:
         bad_request("SUPABASE_URL is not configured.")
 
@@ -166,11 +168,13 @@ def _fetch_profile_role_via_rest(user_id: str, access_token: str) -> Optional[st
         "Accept": "application/json",
     }
 
+    started = time.perf_counter()
     try:
-        with httpx.Client(timeout=10) as client:
-            r = client.get(url, headers=headers, params=params)
+        r = await get_async_client().get(url, headers=headers, params=params, timeout=10)
     except Exception:
+        observe_upstream("GET", "/rest/v1/profiles", "error", time.perf_counter() - started)
         return None
+    observe_upstream("GET", "/rest/v1/profiles", r.status_code, time.perf_counter() - started)
 
     if r.status_code >= 400:
         return None
@@ -185,12 +189,37 @@ def _fetch_profile_role_via_rest(user_id: str, access_token: str) -> Optional[st
     return None
 
 
-def get_current_user(creds: HTTPAuthorizationCredentials | None = Depends(bearer)) -> Dict[str, Any]:
+async def _resolve_db_role(user_id: str, access_token: str) -> Optional[str]:
+    role = _ROLE_CACHE.get(user_id)
+    if role is not None:
+        ROLE_LOOKUPS.inc("cache")
+        return role
+
+    role = await _fetch_profile_role_via_rest(user_id=user_id, access_token=access_token)
+    ROLE_LOOKUPS.inc("rest" if role else "rest_miss")
+    # Only cache real answers; a failed lookup should be retried next request.
+    if role:
+        _ROLE_CACHE.set(user_id, role)
+    return role
+
+
+def invalidate_role_cache(user_id: str | None = None) -> None:
+    if user_id is None:
+        _ROLE_CACHE.clear()
+    else:
+        _ROLE_CACHE.pop(str(user_id))
+
+
+def role_cache_stats() -> dict[str, Any]:
+    return _ROLE_CACHE.stats()
+
+
+async def get_current_user(creds: HTTPAuthorizationCredentials | None = Depends(bearer)) -> Dict[str, Any]:
     if not creds or not creds.credentials:
         unauthorized("Missing Bearer token.")
 
     token = creds.credentials
-    claims = verify_supabase_jwt(token)
+    claims = await verify_supabase_jwt(token)
 
     user_id = claims.get("sub")
     if not user_id:
@@ -199,7 +228,7 @@ def get_current_user(creds: HTTPAuthorizationCredentials | None = Depends(bearer
     email = claims.get("email")
 
     jwt_role = _extract_role_from_claims(claims)
-    db_role = _fetch_profile_role_via_rest(user_id=str(user_id), access_token=token)
+    db_role = await _resolve_db_role(str(user_id), token)
 
     effective_role = db_role or jwt_role
 
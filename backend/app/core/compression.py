@@ -0,0 +1,88 @@
+"""
+Response compression: brotli when the client accepts it and the optional
+`brotli` package is installed, otherwise gzip. Responses below
+COMPRESSION_MIN_SIZE, already-encoded responses (precompressed static
+files) and binary media types are sent unchanged.
+"""
+
+from __future__ import annotations
+
+import anyio.to_thread
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipResponder, IdentityResponder
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+# PDFs are already compressed internally.
+_EXCLUDED_CONTENT_TYPES = DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/pdf", "application/octet-stream")
+
+# Above this, compress in a worker thread so the event loop is not blocked.
+_THREAD_MIN_SIZE = 128 * 1024
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Codings from an Accept-Encoding header, minus any with q=0."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if coding:
+            accepted.add(coding)
+    return accepted
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int, *, exclude_content_types):
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self._compressor = brotli.Compressor(quality=quality)
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= _THREAD_MIN_SIZE:
+            return await anyio.to_thread.run_sync(self._compress_body, body, more_body)
+        return self._compress_body(body, more_body)
+
+    def _compress_body(self, body: bytes, more_body: bool) -> bytes:
+        # Flush each chunk so streamed exports keep streaming.
+        out = self._compressor.process(body)
+        return out + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        minimum_size = settings.COMPRESSION_MIN_SIZE
+        if brotli is not None and "br" in accepted:
+            responder = BrotliResponder(
+                self.app,
+                minimum_size,
+                settings.COMPRESSION_BROTLI_QUALITY,
+                exclude_content_types=_EXCLUDED_CONTENT_TYPES,
+            )
+        elif "gzip" in accepted:
+            responder = GZipResponder(
+                self.app,
+                minimum_size,
+                compresslevel=settings.COMPRESSION_GZIP_LEVEL,
+                thread_minimum_size=_THREAD_MIN_SIZE,
+                exclude_content_types=_EXCLUDED_CONTENT_TYPES,
+            )
+        else:
+            await self.app(scope, receive, send)
+            return
+        await responder(scope, receive, send)
@@ -49,5 +49,93 @@ class Settings:
     # Option A: allow this env var to exist and be read
     SUPABASE_JWT_ALG: str = os.getenv("SUPABASE_JWT_ALG", "")
 
+    # Verified-token cache (claims are also bounded by the token's own exp)
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    AUTH_TOKEN_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "300"))
+
+    # profiles.role lookups made by get_current_user
+    ROLE_CACHE_SIZE: int = int(os.getenv("ROLE_CACHE_SIZE", "10000"))
+    ROLE_CACHE_TTL_SECONDS: float = float(os.getenv("ROLE_CACHE_TTL_SECONDS", "30"))
+
+    # Last good JWKS document, reused by new workers before the first fetch.
+    # Set to an empty string to disable persistence.
+    JWKS_CACHE_PATH: str = os.getenv("JWKS_CACHE_PATH", str(BACKEND_DIR / ".cache" / "jwks.json"))
+
+    # GET /api/tasks keyset pagination
+    TASKS_PAGE_SIZE: int = int(os.getenv("TASKS_PAGE_SIZE", "100"))
+    TASKS_MAX_PAGE_SIZE: int = int(os.getenv("TASKS_MAX_PAGE_SIZE", "500"))
+
+    # Large list endpoints (tasks, staff, audit logs) send upstream rows
+    # without response_model re-validation, encoded with orjson.
+    FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true"
+
+    # Rows fetched per Supabase request while streaming CSV exports
+    EXPORT_PAGE_SIZE: int = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+
+    # Worker processes for PDF rendering (0 renders in a thread instead)
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", "2"))
+
+    # Report endpoints aggregate via the SQL functions in migration 011 and
+    # fall back to scanning task rows when they are not deployed.
+    REPORTS_USE_RPC: bool = os.getenv("REPORTS_USE_RPC", "true").lower() == "true"
+
+    # Task edits go through update_task_versioned (migration 013) and fall
+    # back to a read plus an updated_at-guarded PATCH when it is not deployed.
+    TASKS_USE_UPDATE_RPC: bool = os.getenv("TASKS_USE_UPDATE_RPC", "true").lower() == "true"
+
+    # Cached JSON report responses (invalidated by task/status/tag writes)
+    REPORT_CACHE_SIZE: int = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+    REPORT_CACHE_TTL_SECONDS: float = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "60"))
+
+    # In-process staff directory (email -> id, id -> profile), refreshed
+    # incrementally by profiles.updated_at
+    STAFF_DIRECTORY_REFRESH_SECONDS: float = float(os.getenv("STAFF_DIRECTORY_REFRESH_SECONDS", "60"))
+    STAFF_DIRECTORY_FULL_RELOAD_SECONDS: float = float(os.getenv("STAFF_DIRECTORY_FULL_RELOAD_SECONDS", "3600"))
+
+    # Write-behind audit log queue
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+    AUDIT_FLUSH_INTERVAL_MS: int = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "500"))
+    AUDIT_MAX_PENDING: int = int(os.getenv("AUDIT_MAX_PENDING", "10000"))
+    AUDIT_SPILL_PATH: str = os.getenv("AUDIT_SPILL_PATH", str(BACKEND_DIR / ".cache" / "audit_spill.jsonl"))
+
+    # Outbound HTTP pool shared by every Supabase call (REST, Auth, JWKS)
+    SUPABASE_HTTP_TIMEOUT: float = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "20"))
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "100"))
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "20"))
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("SUPABASE_HTTP_KEEPALIVE_EXPIRY", "30"))
+    # Requires the optional `h2` package (pip install "httpx[http2]").
+    SUPABASE_HTTP2: bool = os.getenv("SUPABASE_HTTP2", "false").lower() == "true"
+
+    # Upstream resilience: retries for idempotent calls, circuit breaker and
+    # the per-request time budget shared by all Supabase calls (0 disables)
+    SUPABASE_RETRY_ATTEMPTS: int = int(os.getenv("SUPABASE_RETRY_ATTEMPTS", "2"))
+    SUPABASE_RETRY_BASE_DELAY: float = float(os.getenv("SUPABASE_RETRY_BASE_DELAY", "0.1"))
+    SUPABASE_RETRY_MAX_DELAY: float = float(os.getenv("SUPABASE_RETRY_MAX_DELAY", "2"))
+    SUPABASE_BREAKER_THRESHOLD: int = int(os.getenv("SUPABASE_BREAKER_THRESHOLD", "5"))
+    SUPABASE_BREAKER_RESET_SECONDS: float = float(os.getenv("SUPABASE_BREAKER_RESET_SECONDS", "30"))
+    REQUEST_DEADLINE_SECONDS: float = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))
+
+    # API responses above COMPRESSION_MIN_SIZE bytes are brotli/gzip encoded
+    # (brotli needs the optional `brotli` package). Built frontend files are
+    # precompressed separately with `python -m app.core.static`.
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+    # Startup: /api/debug/* routes are only imported and mounted when enabled,
+    # and the lifespan warms the Supabase pool, JWKS and staff directory
+    # (bounded by the timeout) before the worker starts serving.
+    DEBUG_ROUTES: bool = os.getenv("DEBUG_ROUTES", "true").lower() == "true"
+    STARTUP_WARMUP: bool = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+    STARTUP_WARMUP_CONNECTIONS: int = int(os.getenv("STARTUP_WARMUP_CONNECTIONS", "4"))
+    STARTUP_WARMUP_TIMEOUT_SECONDS: float = float(os.getenv("STARTUP_WARMUP_TIMEOUT_SECONDS", "5"))
+
+    # Per-request profiling: admins opt in with `X-Debug-Profile: 1`, and a
+    # fraction of all requests can be sampled. Profiles stay in memory.
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_STORE_SIZE: int = int(os.getenv("PROFILE_STORE_SIZE", "50"))
+
 
 settings = Settings()
\ No newline at end of file
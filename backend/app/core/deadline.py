@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from app.core.config import settings
+
+# Monotonic time by which the current request's upstream work must finish.
+# None outside a request (scripts, background tasks) and once streaming starts.
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def remaining_budget() -> float | None:
+    """Seconds left in the current request's budget, or None when unbounded."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@contextmanager
+def deadline_scope(seconds: float | None) -> Iterator[None]:
+    token = _deadline.set(time.monotonic() + seconds if seconds and seconds > 0 else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """
+    Gives every HTTP request a REQUEST_DEADLINE_SECONDS budget for its
+    Supabase calls. Each call's timeout shrinks to what is left, so a slow
+    upstream cannot hold a worker for the full client timeout several times
+    over. The budget is dropped once the response starts, so streamed
+    exports fetch their later pages with the normal per-call timeout.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                _deadline.set(None)
+            await send(message)
+
+        with deadline_scope(settings.REQUEST_DEADLINE_SECONDS):
+            await self.app(scope, receive, send_wrapper)
@@ -17,3 +17,10 @@ def not_found(message: str = "Not found"):
 
 def bad_request(message: str = "Bad request"):
     http_error(400, "BAD_REQUEST", message)
+
+def error_message(exc: HTTPException) -> str:
+    """Message text from an HTTPException raised by http_error (or a plain one)."""
+    detail = exc.detail
+    if isinstance(detail, dict):
+        return str(detail.get("error", {}).get("message") or detail)
+    return str(detail)
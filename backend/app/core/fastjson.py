@@ -0,0 +1,68 @@
+"""
+Fast JSON path for large list responses.
+
+Rows that come straight from PostgREST with an explicit select are already
+in the response shape, so re-validating them through a response_model only
+costs CPU. These helpers return them as a ready Response, which FastAPI
+sends as-is, encoded with orjson when it is installed.
+"""
+
+from __future__ import annotations
+
+import json
+from decimal import Decimal
+from typing import Any
+
+from starlette.responses import JSONResponse, Response
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Body is already-encoded JSON (e.g. a PostgREST response) and is sent unchanged."""
+
+    media_type = "application/json"
+
+
+def trusted_json(content: Any) -> Any:
+    """Skips response_model validation for `content` when FAST_JSON_RESPONSES is on."""
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+    return FastJSONResponse(content)
+
+
+def passthrough_json(body: bytes) -> Any:
+    """Sends upstream JSON bytes without decoding them when FAST_JSON_RESPONSES is on."""
+    if not settings.FAST_JSON_RESPONSES:
+        return loads(body) if body else []
+    return RawJSONResponse(body or b"[]")
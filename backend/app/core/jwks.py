@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from jose import jwk
+from jose.backends.base import Key
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.errors import bad_request, unauthorized
+from app.core.metrics import JWKS_FETCHES, observe_upstream
+from app.db.supabase_async import get_async_client
+
+logger = logging.getLogger(__name__)
+
+_JWKS_TTL_SECONDS = 60 * 10
+# Background refresh fires this fraction of the way through the TTL so
+# request handlers never see an expired key ring.
+_JWKS_REFRESH_AHEAD = 0.8
+_JWKS_RETRY_SECONDS = 30
+# Keys older than the TTL keep verifying while the background refresher
+# catches up, but never beyond this age.
+_JWKS_MAX_STALE_SECONDS = 60 * 60 * 24
+# Request-driven fetches (unknown kid, empty or expired ring) start at most
+# once per interval, counted from the last attempt so a failing endpoint is
+# not retried per request; kids still unknown after a successful fetch are
+# remembered so garbage tokens fail fast.
+_JWKS_MIN_FORCED_REFRESH_SECONDS = 30
+_UNKNOWN_KID_TTL_SECONDS = 60
+
+_DEFAULT_ALG_BY_KTY = {"EC": "ES256", "RSA": "RS256"}
+
+
+def _jwks_url() -> str:
+    if not settings.SUPABASE_URL:
+        bad_request("SUPABASE_URL is not configured.")
+    return settings.SUPABASE_URL.rstrip("/") + "/auth/v1/.well-known/jwks.json"
+
+
+def _construct_key(raw: dict[str, Any]) -> Optional[tuple[str, Key]]:
+    alg = (raw.get("alg") or _DEFAULT_ALG_BY_KTY.get(raw.get("kty", ""), "")).upper()
+    if alg not in ("ES256", "RS256"):
+        return None
+    try:
+        return alg, jwk.construct(raw, algorithm=alg)
+    except Exception:
+        return None
+
+
+class JwksKeyRing:
+    """
+    Ready-to-use verifier objects per `kid`, built once per JWKS fetch.
+
+    The last good JWKS document is persisted to `cache_path` so a freshly
+    started worker can verify tokens before it has talked to Supabase.
+    """
+
+    def __init__(self, *, ttl: float, cache_path: Path | None):
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self.fetched_at: float | None = None
+        self.attempted_at: float | None = None
+        self.fetch_count = 0
+        self._keys: dict[str, tuple[str, Key]] = {}
+        self._inflight: asyncio.Task | None = None
+        self._unknown_kids = TTLCache(maxsize=1024, ttl=_UNKNOWN_KID_TTL_SECONDS)
+
+    def load(self, jwks: dict[str, Any], fetched_at: float) -> None:
+        keys: dict[str, tuple[str, Key]] = {}
+        raw_keys = jwks.get("keys", [])
+        if isinstance(raw_keys, list):
+            for raw in raw_keys:
+                if not isinstance(raw, dict) or not raw.get("kid"):
+                    continue
+                built = _construct_key(raw)
+                if built:
+                    keys[raw["kid"]] = built
+
+        self._keys = keys
+        self.fetched_at = fetched_at
+
+    def get(self, kid: str) -> Optional[tuple[str, Key]]:
+        return self._keys.get(kid)
+
+    def is_empty(self) -> bool:
+        return not self._keys
+
+    def age(self, now: float | None = None) -> float:
+        if self.fetched_at is None:
+            return float("inf")
+        return (now or time.time()) - self.fetched_at
+
+    def _since_attempt(self) -> float:
+        if self.attempted_at is None:
+            return float("inf")
+        return time.time() - self.attempted_at
+
+    def _may_fetch(self) -> bool:
+        """A request may start a fetch (or join the running one) now."""
+        return self._inflight is not None or self._since_attempt() >= _JWKS_MIN_FORCED_REFRESH_SECONDS
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "keys": len(self._keys),
+            "age_seconds": round(self.age(), 1) if self.fetched_at else None,
+            "fetch_count": self.fetch_count,
+            "unknown_kids": self._unknown_kids.stats(),
+        }
+
+    # -- persistence -------------------------------------------------------
+
+    def load_from_disk(self) -> bool:
+        if not self.cache_path or not self.cache_path.exists():
+            return False
+        try:
+            payload = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            self.load(payload["jwks"], float(payload["fetched_at"]))
+        except Exception:
+            logger.warning("Ignoring unreadable JWKS cache at %s", self.cache_path)
+            return False
+        return not self.is_empty()
+
+    def _persist(self, jwks: dict[str, Any], fetched_at: float) -> None:
+        if not self.cache_path:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"fetched_at": fetched_at, "jwks": jwks}), encoding="utf-8")
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            logger.warning("Could not persist JWKS cache to %s", self.cache_path)
+
+    # -- network -----------------------------------------------------------
+
+    async def _fetch(self) -> None:
+        self.fetch_count += 1
+        self.attempted_at = time.time()
+        started = time.perf_counter()
+        try:
+            r = await get_async_client().get(_jwks_url(), timeout=10)
+            observe_upstream("GET", "/auth/v1/.well-known/jwks.json", r.status_code, time.perf_counter() - started)
+            r.raise_for_status()
+            jwks = r.json()
+        except Exception:
+            JWKS_FETCHES.inc("error")
+            unauthorized("Unable to fetch JWKS.")
+        JWKS_FETCHES.inc("ok")
+
+        now = time.time()
+        self.load(jwks, now)
+        self._persist(jwks, now)
+
+    async def refresh(self) -> None:
+        """
+        Single-flight refresh: concurrent callers share one in-flight fetch
+        and all receive its result (or its error).
+        """
+        task = self._inflight
+        if task is None or task.done():
+            task = asyncio.create_task(self._fetch())
+            self._inflight = task
+            task.add_done_callback(self._clear_inflight)
+        # shield() keeps one cancelled waiter from cancelling the shared fetch.
+        await asyncio.shield(task)
+
+    def _clear_inflight(self, task: asyncio.Task) -> None:
+        if self._inflight is task:
+            self._inflight = None
+        if not task.cancelled():
+            task.exception()  # mark retrieved; waiters already re-raised it
+
+    async def refresh_for_kid(self, kid: str) -> Optional[tuple[str, Key]]:
+        """
+        Forced refresh for a kid that is not in the ring, rate-limited and
+        negatively cached so unknown kids cannot hammer the JWKS endpoint.
+        Inside the rate-limit window (including after a failed fetch) the
+        kid simply misses.
+        """
+        if self._unknown_kids.get(kid):
+            return None
+
+        refreshed = self._may_fetch()
+        if refreshed:
+            await self.refresh()
+
+        entry = self.get(kid)
+        # Only a kid that is still missing after a fetch is known to be bad. A
+        # rate-limited miss may be a key rotated in since the last fetch, and
+        # must not be remembered past the rate limit.
+        if entry is None and refreshed:
+            self._unknown_kids.set(kid, True)
+        return entry
+
+    async def ensure_loaded(self) -> None:
+        if self.is_empty():
+            self.load_from_disk()
+        if self.is_empty() or self.age() >= _JWKS_MAX_STALE_SECONDS:
+            if not self._may_fetch():
+                # The last fetch failed moments ago; fail fast rather than
+                # refetch for every request until it recovers.
+                unauthorized("Unable to fetch JWKS.")
+            await self.refresh()
+
+    async def run_refresher(self) -> None:
+        while True:
+            if self.fetched_at is None:
+                delay = 0.0
+            else:
+                delay = max(0.0, self.fetched_at + self.ttl * _JWKS_REFRESH_AHEAD - time.time())
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.warning("Background JWKS refresh failed; retrying in %ss", _JWKS_RETRY_SECONDS)
+                await asyncio.sleep(_JWKS_RETRY_SECONDS)
+
+
+key_ring = JwksKeyRing(
+    ttl=_JWKS_TTL_SECONDS,
+    cache_path=Path(settings.JWKS_CACHE_PATH) if settings.JWKS_CACHE_PATH else None,
+)
+
+
+def start_jwks_refresher() -> asyncio.Task:
+    key_ring.load_from_disk()
+    return asyncio.create_task(key_ring.run_refresher())
@@ -0,0 +1,194 @@
+"""
+Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Counters and histograms are per worker process; scrape each worker (or run a
+single worker) the same way the other in-process caches are reported.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Iterable
+
+from app.core.profiling import record_span
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = tuple(str(v) for v in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = tuple(str(v) for v in labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += 1
+            row[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(row)) for key, row in self._values.items())
+        for key, row in items:
+            for bound, count in zip(self.buckets, row):
+                le = f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {count:g}")
+            inf = _labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {row[-2]:g}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {row[-2]:g}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {row[-1]:.6f}")
+        return lines
+
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+HTTP_UPSTREAM_CALLS = Histogram(
+    "http_request_upstream_calls",
+    "Supabase calls made while handling one HTTP request.",
+    ("method", "route"),
+    buckets=COUNT_BUCKETS,
+)
+UPSTREAM_REQUESTS = Counter("supabase_requests_total", "Supabase HTTP calls.", ("method", "path", "status"))
+UPSTREAM_LATENCY = Histogram("supabase_request_duration_seconds", "Supabase HTTP call latency.", ("method", "path"))
+JWKS_FETCHES = Counter("jwks_fetches_total", "JWKS fetches from Supabase Auth.", ("outcome",))
+ROLE_LOOKUPS = Counter("role_lookups_total", "Profile role resolutions.", ("source",))
+
+_REGISTRY = (
+    HTTP_REQUESTS,
+    HTTP_LATENCY,
+    HTTP_UPSTREAM_CALLS,
+    UPSTREAM_REQUESTS,
+    UPSTREAM_LATENCY,
+    JWKS_FETCHES,
+    ROLE_LOOKUPS,
+)
+
+# Mutable cell shared with child tasks (asyncio.gather copies the context,
+# not the list), so fan-out calls are counted against their request.
+_upstream_calls: ContextVar[list[int] | None] = ContextVar("upstream_calls", default=None)
+
+_ID_SEGMENT = re.compile(r"^(?:[0-9a-fA-F-]{32,36}|\d+)$")
+
+
+def _path_label(path: str) -> str:
+    # Keep label cardinality bounded: ids in paths collapse to {id}.
+    return "/".join("{id}" if _ID_SEGMENT.match(seg) else seg for seg in path.split("/"))
+
+
+def _route_label(scope) -> str:
+    """
+    Templated path of the matched route (e.g. /api/tasks/{task_id} or
+    /api/debug/profiles/{profile_id}.prof), so ids never become label values.
+
+    Routes in included routers only know their router-relative template, so
+    the router prefix is taken from the front of the request path: the
+    template's segments are a suffix of it (no route uses a `:path`
+    converter).
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+    depth = template.count("/")
+    path = scope.get("path", "")
+    prefix = path.rsplit("/", depth)[0] if depth else path
+    return prefix + template
+
+
+def observe_upstream(method: str, path: str, status: int | str, seconds: float) -> None:
+    label = _path_label(path)
+    UPSTREAM_REQUESTS.inc(method, label, str(status))
+    UPSTREAM_LATENCY.observe(seconds, method, label)
+    record_span("supabase", seconds)
+    cell = _upstream_calls.get()
+    if cell is not None:
+        cell[0] += 1
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Records latency, status and upstream call count for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        cell = [0]
+        token = _upstream_calls.set(cell)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _upstream_calls.reset(token)
+            route = _route_label(scope)
+            method = scope.get("method", "")
+            HTTP_REQUESTS.inc(method, route, str(status["code"]))
+            HTTP_LATENCY.observe(elapsed, method, route)
+            HTTP_UPSTREAM_CALLS.observe(cell[0], method, route)
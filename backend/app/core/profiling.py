@@ -0,0 +1,229 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when an admin sends `X-Debug-Profile: 1`, or when it
+is picked by PROFILE_SAMPLE_RATE. The profile holds the wall-clock time,
+cProfile stats and tagged spans: Supabase calls (fed by
+metrics.observe_upstream), JWT verification and response serialization.
+The most recent PROFILE_STORE_SIZE profiles are kept in memory and served
+from /api/debug/profiles.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from contextvars import ContextVar
+from typing import Any
+
+import anyio.to_thread
+
+from app.core.config import settings
+
+PROFILE_HEADER = "x-debug-profile"
+
+# (file suffix, function name) pairs whose cumulative cProfile time counts as
+# serialization: FastAPI's response validation/encoding, the stock JSON
+# render, and the fast path in app.core.fastjson (FastJSONResponse.render
+# calls dumps; loads decodes PostgREST bodies). None of these call another,
+# so nothing is counted twice.
+_SERIALIZATION_FUNCS = {
+    ("fastapi/routing.py", "serialize_response"),
+    ("starlette/responses.py", "render"),
+    ("app/core/fastjson.py", "dumps"),
+    ("app/core/fastjson.py", "loads"),
+}
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = time.time()
+        self.status: int | None = None
+        self.wall_ms = 0.0
+        self.spans: dict[str, list[float]] = defaultdict(lambda: [0, 0.0])
+        self.cprofile_bytes: bytes | None = None
+        self.top_functions = ""
+
+    def add_span(self, name: str, seconds: float) -> None:
+        span = self.spans[name]
+        span[0] += 1
+        span[1] += seconds
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "wall_ms": round(self.wall_ms, 3),
+            "spans": {
+                name: {"count": int(count), "ms": round(seconds * 1000, 3)}
+                for name, (count, seconds) in sorted(self.spans.items())
+            },
+            "cprofile": self.cprofile_bytes is not None,
+        }
+
+
+_active: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+def record_span(name: str, seconds: float) -> None:
+    """Adds time already measured by the caller to the current profile, if any."""
+    profile = _active.get()
+    if profile is not None:
+        profile.add_span(name, seconds)
+
+
+class profile_span:
+    """Adds the wall-clock time of the block to the current request's profile, if any."""
+
+    __slots__ = ("name", "profile", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.profile = None
+        self.started = 0.0
+
+    def __enter__(self):
+        self.profile = _active.get()
+        if self.profile is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.add_span(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class ProfileStore:
+    def __init__(self, maxsize: int):
+        self.maxsize = max(1, maxsize)
+        self._items: OrderedDict[str, RequestProfile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._items[profile.id] = profile
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def get(self, profile_id: str) -> RequestProfile | None:
+        return self._items.get(profile_id)
+
+    def list(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [p.summary() for p in reversed(self._items.values())]
+
+
+profile_store = ProfileStore(settings.PROFILE_STORE_SIZE)
+
+# cProfile hooks the whole thread, so only one request at a time gets
+# function-level stats; overlapping ones still record wall-clock spans.
+_cprofile_busy = threading.Lock()
+
+
+def _finish_cprofile(profile: RequestProfile, profiler) -> None:
+    import io
+    import marshal
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    profile.cprofile_bytes = marshal.dumps(stats.stats)
+
+    serialization = 0.0
+    for (filename, _, funcname), (_, _, _, cumtime, _) in stats.stats.items():
+        if any(filename.endswith(suffix) and funcname == name for suffix, name in _SERIALIZATION_FUNCS):
+            serialization += cumtime
+    if serialization:
+        profile.add_span("serialization", serialization)
+
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats("cumulative").print_stats(30)
+    profile.top_functions = out.getvalue()
+
+
+async def _is_admin(headers: dict[bytes, bytes]) -> bool:
+    # Imported here: auth pulls in the Supabase client, which imports this
+    # module for profile_span.
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    from app.core.auth import get_current_user
+    from app.core.roles import _get_effective_role
+
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user = await get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+    except Exception:
+        return False
+    return _get_effective_role(user) == "admin"
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def _reason(self, scope) -> str | None:
+        headers = dict(scope.get("headers") or [])
+        if headers.get(PROFILE_HEADER.encode(), b"").strip() in (b"1", b"true"):
+            return "header" if await _is_admin(headers) else None
+        if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await self._reason(scope)
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope.get("method", ""), scope.get("path", ""), reason)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                # Only the admin who asked for the profile learns its id;
+                # sampled requests from ordinary callers look unchanged.
+                if reason == "header":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        profiler = None
+        if _cprofile_busy.acquire(blocking=False):
+            # Imported on first use; most workers never profile a request.
+            import cProfile
+
+            profiler = cProfile.Profile()
+        token = _active.set(profile)
+        started = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _cprofile_busy.release()
+            profile.wall_ms = (time.perf_counter() - started) * 1000
+            _active.reset(token)
+            if profiler is not None:
+                # pstats over a whole-thread profile takes a while; keep it off
+                # the event loop so concurrent requests are not stalled.
+                await anyio.to_thread.run_sync(_finish_cprofile, profile, profiler)
+            profile_store.add(profile)
@@ -0,0 +1,133 @@
+"""
+Static serving for the built frontend (frontend/dist).
+
+- Files with a `.br` / `.gz` sibling are served from it when the client
+  accepts that encoding. Siblings are written after each frontend build by
+  `python -m app.core.static` (run from backend/), never at startup.
+- Vite's content-hashed files under assets/ are cached as immutable;
+  everything else (index.html, favicon, ...) must be revalidated.
+- Unknown non-API paths get index.html from memory, with an ETag, so deep
+  links into the SPA work and repeat visits get 304s.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import re
+import sys
+import tempfile
+from mimetypes import guess_type
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.core.compression import accepted_encodings, brotli
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Vite output names: assets/<name>-<hash>.<ext>
+_HASHED_ASSET = re.compile(r"^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+
+_PRECOMPRESS_SUFFIXES = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".txt", ".map", ".xml", ".wasm"}
+_PRECOMPRESS_MIN_SIZE = 1024
+
+
+def _write_atomic(target: Path, data: bytes) -> None:
+    # Servers may be reading the sibling while it is rewritten; they must
+    # see either the old or the new file, never a partial one.
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def precompress_directory(directory: Path) -> int:
+    """Writes .gz (and .br when brotli is installed) siblings that are missing or stale."""
+    written = 0
+    for path in directory.rglob("*"):
+        if not path.is_file() or path.suffix not in _PRECOMPRESS_SUFFIXES:
+            continue
+        stat = path.stat()
+        if stat.st_size < _PRECOMPRESS_MIN_SIZE:
+            continue
+        variants = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", lambda data: brotli.compress(data, quality=11)))
+        data = None
+        for suffix, compress in variants:
+            target = path.with_name(path.name + suffix)
+            if target.exists() and target.stat().st_mtime >= stat.st_mtime:
+                continue
+            data = data if data is not None else path.read_bytes()
+            _write_atomic(target, compress(data))
+            written += 1
+    return written
+
+
+class SPAStaticFiles(StaticFiles):
+    def __init__(self, directory: Path):
+        super().__init__(directory=directory)
+        index = (directory / "index.html").read_bytes()
+        self._index = index
+        self._index_etag = '"' + hashlib.sha256(index).hexdigest()[:32] + '"'
+
+    def index_response(self, scope) -> Response:
+        headers = {"ETag": self._index_etag, "Cache-Control": REVALIDATE}
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+        if self._index_etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        return Response(self._index, media_type="text/html", headers=headers)
+
+    async def get_response(self, path: str, scope) -> Response:
+        if path in ("", ".", "index.html"):
+            return self.index_response(scope)
+        try:
+            response = await super().get_response(path, scope)
+        except HTTPException as exc:
+            # Unknown API paths and assets stay 404s; anything else is a
+            # client-side route.
+            if exc.status_code != 404 or path == "api" or path.startswith(("api/", "assets/")):
+                raise
+            return self.index_response(scope)
+        response.headers["Cache-Control"] = IMMUTABLE if _HASHED_ASSET.match(path) else REVALIDATE
+        return response
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding not in accepted:
+                continue
+            variant = f"{full_path}{suffix}"
+            try:
+                variant_stat = os.stat(variant)
+            except OSError:
+                continue
+            response = FileResponse(
+                variant,
+                status_code=status_code,
+                stat_result=variant_stat,
+                media_type=guess_type(str(full_path))[0] or "text/plain",
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            )
+            if self.is_not_modified(response.headers, Headers(scope=scope)):
+                return NotModifiedResponse(response.headers)
+            return response
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers.setdefault("Vary", "Accept-Encoding")
+        return response
+
+
+if __name__ == "__main__":
+    # python -m app.core.static [dist_dir]   (defaults to ../frontend/dist)
+    dist = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parents[3] / "frontend" / "dist"
+    print(f"Precompressed {precompress_directory(dist)} files in {dist}")
@@ -91,32 +91,28 @@ def query_tag_summary(
     user_jwt: str,
     start_date: date | None,
     end_date: date | None,
+    page_size: int = 1000,
 ) -> list[dict]:
-    # Date filter must apply to tasks, not task_tags.
-    task_params = {"select": "id"}
-    task_params.update(_range_filter_params(start_date, end_date))
-    tasks = sb_get(f"{REST}/tasks", user_jwt=user_jwt, params=task_params)
-
-    task_ids = [t["id"] for t in tasks if "id" in t]
-    if not task_ids:
-        return []
-
-    tags = sb_get(f"{REST}/tags", user_jwt=user_jwt, params={"select": "id,name"})
-    tag_name = {t["id"]: t["name"] for t in tags}
-
-    joins = sb_get(
-        f"{REST}/task_tags",
-        user_jwt=user_jwt,
-        params={
-            "select": "tag_id,task_id",
-            "task_id": f"in.({','.join(map(str, task_ids))})",
-        },
-    )
+    # Date filter must apply to tasks, not task_tags: inner-join the tasks
+    # embed and filter on it, instead of sending every task id in the URL.
+    params: dict = {
+        "select": "task_id,tag_id,tags(name),tasks!inner(id)",
+        "order": "task_id.asc,tag_id.asc",
+        "limit": page_size,
+    }
+    params.update({f"tasks.{k}": v for k, v in _range_filter_params(start_date, end_date).items()})
 
     counts = defaultdict(int)
-    for j in joins:
-        tid = j.get("tag_id")
-        label = tag_name.get(tid, str(tid))
-        counts[label] += 1
+    while True:
+        joins = sb_get(f"{REST}/task_tags", user_jwt=user_jwt, params=params)
+        for j in joins:
+            tag = j.get("tags") or {}
+            label = tag.get("name") or str(j.get("tag_id"))
+            counts[label] += 1
+
+        if len(joins) < page_size:
+            break
+        last = joins[-1]
+        params["or"] = f"(task_id.gt.{last['task_id']},and(task_id.eq.{last['task_id']},tag_id.gt.{last['tag_id']}))"
 
     return [{"tag": k, "total_tasks": v} for k, v in counts.items()]
@@ -0,0 +1,174 @@
+"""
+Retry, backoff, circuit-breaker and deadline helpers shared by the sync and
+async Supabase clients (see `_send` in supabase_http / supabase_async).
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+from app.core.deadline import remaining_budget
+from app.core.errors import http_error
+
+# Safe to repeat: the server state after N identical calls equals one call.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+
+# Failures where the request never reached Supabase, so even a POST/PATCH
+# can be retried without risking a duplicate write.
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker. After `threshold` upstream failures (5xx or
+    transport errors) calls fail fast with 503 for `reset_seconds`; then one
+    probe call is let through and its result closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        if self.threshold <= 0:
+            return
+
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                self._probe_started = 0.0
+
+            if self.state == "closed":
+                return
+            # A probe that never reported back (e.g. cancelled) must not
+            # wedge the circuit half-open, so it expires after reset_seconds.
+            now = time.monotonic()
+            if self.state == "half_open" and now - self._probe_started >= self.reset_seconds:
+                self._probe_started = now
+                return
+
+            self.rejected += 1
+
+        http_error(503, "UPSTREAM_UNAVAILABLE", "Supabase is temporarily unavailable. Try again shortly.")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        if self.threshold <= 0:
+            return
+
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def record_transport_error(self, exc: httpx.TransportError, timeout: float) -> None:
+        # A timeout we shortened to fit the caller's deadline says nothing about
+        # Supabase's health; counting it would let a few slow handlers near
+        # their budget open the circuit for everyone.
+        if isinstance(exc, httpx.TimeoutException) and timeout < settings.SUPABASE_HTTP_TIMEOUT:
+            with self._lock:
+                if self.state == "half_open":
+                    self._probe_started = 0.0  # let the next call probe instead
+            return
+        self.record_failure()
+
+    def record_status(self, status_code: int) -> None:
+        if status_code >= 500:
+            self.record_failure()
+        elif status_code != 429:
+            # 429 means Supabase is up but throttling us; leave the count alone.
+            self.record_success()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "threshold": self.threshold,
+            "reset_seconds": self.reset_seconds,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+breaker = CircuitBreaker(settings.SUPABASE_BREAKER_THRESHOLD, settings.SUPABASE_BREAKER_RESET_SECONDS)
+
+
+def call_timeout() -> float:
+    """Timeout for the next upstream call, capped by the request's remaining budget."""
+    remaining = remaining_budget()
+    if remaining is None:
+        return settings.SUPABASE_HTTP_TIMEOUT
+    if remaining <= 0:
+        http_error(504, "UPSTREAM_TIMEOUT", "Request deadline exceeded while waiting on Supabase.")
+    return min(settings.SUPABASE_HTTP_TIMEOUT, remaining)
+
+
+def _retry_after(value: str | None) -> float | None:
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+def retry_delay(
+    method: str,
+    attempt: int,
+    *,
+    response: httpx.Response | None = None,
+    exc: Exception | None = None,
+) -> float | None:
+    """
+    Seconds to wait before retrying, or None when the call should not be
+    retried (non-idempotent verb, attempts used up, or no budget left).
+    """
+    if attempt >= settings.SUPABASE_RETRY_ATTEMPTS:
+        return None
+
+    if exc is not None:
+        if not isinstance(exc, _NOT_SENT) and method not in IDEMPOTENT_METHODS:
+            return None
+    elif response is None or response.status_code not in RETRYABLE_STATUSES or method not in IDEMPOTENT_METHODS:
+        return None
+
+    # Full jitter keeps workers that failed together from retrying together.
+    cap = min(settings.SUPABASE_RETRY_MAX_DELAY, settings.SUPABASE_RETRY_BASE_DELAY * (2 ** attempt))
+    delay = random.uniform(0, cap)
+
+    if response is not None:
+        hinted = _retry_after(response.headers.get("retry-after"))
+        if hinted is not None:
+            if hinted > settings.SUPABASE_RETRY_MAX_DELAY:
+                return None
+            delay = max(delay, hinted)
+
+    remaining = remaining_budget()
+    if remaining is not None and remaining <= delay:
+        return None
+    return delay
+
+
+def upstream_error(exc: httpx.TransportError):
+    if isinstance(exc, httpx.TimeoutException):
+        http_error(504, "UPSTREAM_TIMEOUT", "Supabase did not respond in time.")
+    http_error(502, "UPSTREAM_UNAVAILABLE", f"Could not reach Supabase: {type(exc).__name__}")
@@ -0,0 +1,265 @@
+"""
+Async twin of app.db.supabase_http.
+
+Same helper names and signatures, but every call is a coroutine running on a
+shared httpx.AsyncClient, so a single event loop can keep many Supabase
+requests in flight. Routes and services use this module; the sync API in
+supabase_http stays available for scripts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+from app.core.fastjson import loads
+from app.core.metrics import observe_upstream
+from app.db.resilience import breaker, call_timeout, retry_delay, upstream_error
+from app.db.supabase_http import (
+    _base_url,
+    _handle_error,
+    _headers,
+    _http2_enabled,
+    _limits,
+    _require_service_key,
+    _write_headers,
+    in_list,  # noqa: F401  (re-exported for services)
+    in_list_chunks,  # noqa: F401
+)
+
+
+# ---------------------------------------------------------------------------
+# Shared connection pool
+# ---------------------------------------------------------------------------
+
+_client: httpx.AsyncClient | None = None
+
+
+def init_async_client() -> httpx.AsyncClient:
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=settings.SUPABASE_HTTP_TIMEOUT,
+            limits=_limits(),
+            http2=_http2_enabled(),
+        )
+    return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    client = _client
+    if client is None or client.is_closed:
+        return init_async_client()
+    return client
+
+
+async def close_async_client() -> None:
+    global _client
+
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+async def _send(
+    method: str,
+    path: str,
+    *,
+    headers: dict[str, str],
+    json: Any = None,
+    params: dict | None = None,
+) -> httpx.Response:
+    url = _base_url() + path
+    attempt = 0
+    while True:
+        timeout = call_timeout()
+        breaker.before_call()
+        started = time.perf_counter()
+        try:
+            r = await get_async_client().request(
+                method,
+                url,
+                headers=headers,
+                json=json,
+                params=params,
+                timeout=timeout,
+            )
+        except httpx.TransportError as exc:
+            observe_upstream(method, path, "error", time.perf_counter() - started)
+            breaker.record_transport_error(exc, timeout)
+            delay = retry_delay(method, attempt, exc=exc)
+            if delay is None:
+                upstream_error(exc)
+        else:
+            observe_upstream(method, path, r.status_code, time.perf_counter() - started)
+            breaker.record_status(r.status_code)
+            delay = retry_delay(method, attempt, response=r)
+            if delay is None:
+                if r.status_code >= 400:
+                    _handle_error(r)
+                return r
+            await r.aclose()
+
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+# ---------------------------------------------------------------------------
+# User-scoped PostgREST helpers
+# ---------------------------------------------------------------------------
+
+async def sb_get(path: str, *, user_jwt: str | None = None, params: dict | None = None) -> Any:
+    r = await _send(
+        "GET",
+        path,
+        headers=_headers(apikey=settings.SUPABASE_ANON_KEY, bearer=user_jwt),
+        params=params,
+    )
+    return loads(r.content)
+
+
+async def sb_get_raw(path: str, *, user_jwt: str | None = None, params: dict | None = None) -> bytes:
+    """Like sb_get, but returns the undecoded body for pass-through responses."""
+    r = await _send(
+        "GET",
+        path,
+        headers=_headers(apikey=settings.SUPABASE_ANON_KEY, bearer=user_jwt),
+        params=params,
+    )
+    return r.content
+
+
+async def sb_post(
+    path: str,
+    *,
+    user_jwt: str | None = None,
+    json: Any = None,
+    params: dict | None = None,
+    extra_headers: dict[str, str] | None = None,
+) -> Any:
+    r = await _send(
+        "POST",
+        path,
+        headers=_headers(
+            apikey=settings.SUPABASE_ANON_KEY,
+            bearer=user_jwt,
+            extra=_write_headers(extra_headers),
+        ),
+        json=json,
+        params=params,
+    )
+    return r.json() if r.text else []
+
+
+async def sb_patch(
+    path: str,
+    *,
+    user_jwt: str | None = None,
+    json: Any = None,
+    params: dict | None = None,
+    extra_headers: dict[str, str] | None = None,
+) -> Any:
+    r = await _send(
+        "PATCH",
+        path,
+        headers=_headers(
+            apikey=settings.SUPABASE_ANON_KEY,
+            bearer=user_jwt,
+            extra=_write_headers(extra_headers),
+        ),
+        json=json,
+        params=params,
+    )
+    return r.json() if r.text else []
+
+
+async def sb_delete(
+    path: str,
+    *,
+    user_jwt: str | None = None,
+    params: dict | None = None,
+    extra_headers: dict[str, str] | None = None,
+) -> Any:
+    r = await _send(
+        "DELETE",
+        path,
+        headers=_headers(
+            apikey=settings.SUPABASE_ANON_KEY,
+            bearer=user_jwt,
+            extra=_write_headers(extra_headers),
+        ),
+        params=params,
+    )
+    return r.json() if r.text else []
+
+
+# ---------------------------------------------------------------------------
+# Admin helpers
+# ---------------------------------------------------------------------------
+
+async def sb_admin_get(path: str, *, params: dict | None = None) -> Any:
+    key = _require_service_key()
+    r = await _send(
+        "GET",
+        path,
+        headers=_headers(apikey=key, bearer=key),
+        params=params,
+    )
+    return r.json()
+
+
+async def sb_admin_post(
+    path: str,
+    *,
+    json: Any = None,
+    params: dict | None = None,
+    extra_headers: dict[str, str] | None = None,
+) -> Any:
+    key = _require_service_key()
+    r = await _send(
+        "POST",
+        path,
+        headers=_headers(apikey=key, bearer=key, extra=_write_headers(extra_headers)),
+        json=json,
+        params=params,
+    )
+    return r.json() if r.text else []
+
+
+async def sb_admin_patch(
+    path: str,
+    *,
+    json: Any = None,
+    params: dict | None = None,
+    extra_headers: dict[str, str] | None = None,
+) -> Any:
+    key = _require_service_key()
+    r = await _send(
+        "PATCH",
+        path,
+        headers=_headers(apikey=key, bearer=key, extra=_write_headers(extra_headers)),
+        json=json,
+        params=params,
+    )
+    return r.json() if r.text else []
+
+
+async def sb_admin_delete(
+    path: str,
+    *,
+    params: dict | None = None,
+    extra_headers: dict[str, str] | None = None,
+) -> Any:
+    key = _require_service_key()
+    r = await _send(
+        "DELETE",
+        path,
+        headers=_headers(apikey=key, bearer=key, extra=_write_headers(extra_headers)),
+        params=params,
+    )
+    return r.json() if r.text else []
@@ -1,11 +1,72 @@
 from __future__ import annotations
 
+import threading
+import time
 from typing import Any
 
 import httpx
 
 from app.core.config import settings
 from app.core.errors import bad_request, http_error
+from app.core.metrics import observe_upstream
+from app.db.resilience import breaker, call_timeout, retry_delay, upstream_error
+
+# ---------------------------------------------------------------------------
+# Shared connection pool
+# ---------------------------------------------------------------------------
+# One process-wide client keeps TCP/TLS connections to Supabase alive between
+# calls. It is opened by the app lifespan (see app.main) and lazily on first
+# use for scripts that never start the app.
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _http2_enabled() -> bool:
+    if not settings.SUPABASE_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def init_client() -> httpx.Client:
+    global _client
+
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(
+                timeout=settings.SUPABASE_HTTP_TIMEOUT,
+                limits=_limits(),
+                http2=_http2_enabled(),
+            )
+        return _client
+
+
+def get_client() -> httpx.Client:
+    client = _client
+    if client is None or client.is_closed:
+        return init_client()
+    return client
+
+
+def close_client() -> None:
+    global _client
+
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
 
 
 def _base_url() -> str:
@@ -41,21 +102,103 @@ def _handle_error(resp: httpx.Response):
     http_error(resp.status_code, "SUPABASE_API_ERROR", str(payload))
 
 
+def _send(
+    method: str,
+    path: str,
+    *,
+    headers: dict[str, str],
+    json: Any = None,
+    params: dict | None = None,
+) -> httpx.Response:
+    url = _base_url() + path
+    attempt = 0
+    while True:
+        timeout = call_timeout()
+        breaker.before_call()
+        started = time.perf_counter()
+        try:
+            r = get_client().request(
+                method,
+                url,
+                headers=headers,
+                json=json,
+                params=params,
+                timeout=timeout,
+            )
+        except httpx.TransportError as exc:
+            observe_upstream(method, path, "error", time.perf_counter() - started)
+            breaker.record_transport_error(exc, timeout)
+            delay = retry_delay(method, attempt, exc=exc)
+            if delay is None:
+                upstream_error(exc)
+        else:
+            observe_upstream(method, path, r.status_code, time.perf_counter() - started)
+            breaker.record_status(r.status_code)
+            delay = retry_delay(method, attempt, response=r)
+            if delay is None:
+                if r.status_code >= 400:
+                    _handle_error(r)
+                return r
+            r.close()
+
+        time.sleep(delay)
+        attempt += 1
+
+
+def in_list(values) -> str:
+    """
+    PostgREST `in.()` filter value with every item double-quoted, so commas,
+    parentheses and quotes inside values cannot break the list.
+    """
+    quoted = []
+    for value in values:
+        text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        quoted.append(f'"{text}"')
+    return f"in.({','.join(quoted)})"
+
+
+# Each `in.()` filter stays well under the 8 KB request-line limit common on
+# gateways and proxies, even after percent-encoding.
+IN_LIST_MAX_VALUES = 100
+IN_LIST_MAX_CHARS = 2000
+
+
+def in_list_chunks(values) -> list[str]:
+    """Splits `values` into as many `in_list` filters as the URL limits need."""
+    chunks: list[str] = []
+    current: list = []
+    size = 0
+    for value in values:
+        length = len(str(value)) + 3
+        if current and (len(current) >= IN_LIST_MAX_VALUES or size + length > IN_LIST_MAX_CHARS):
+            chunks.append(in_list(current))
+            current, size = [], 0
+        current.append(value)
+        size += length
+    if current:
+        chunks.append(in_list(current))
+    return chunks
+
+
+def _write_headers(extra_headers: dict[str, str] | None) -> dict[str, str]:
+    headers = {"Prefer": "return=representation"}
+    if extra_headers:
+        headers.update(extra_headers)
+    return headers
+
+
 # ---------------------------------------------------------------------------
 # User-scoped PostgREST helpers
 # ---------------------------------------------------------------------------
 
 def sb_get(path: str, *, user_jwt: str | None = None, params: dict | None = None) -> Any:
-    url = _base_url() + path
-    with httpx.Client(timeout=20) as client:
-        r = client.get(
-            url,
-            headers=_headers(apikey=settings.SUPABASE_ANON_KEY, bearer=user_jwt),
-            params=params,
-        )
-        if r.status_code >= 400:
-            _handle_error(r)
-        return r.json()
+    r = _send(
+        "GET",
+        path,
+        headers=_headers(apikey=settings.SUPABASE_ANON_KEY, bearer=user_jwt),
+        params=params,
+    )
+    return r.json()
 
 
 def sb_post(
@@ -73,31 +216,18 @@ def sb_post(
     does not incorrectly treat successful inserts as failures.
     """
 
-    url = _base_url() + path
-
-    headers = {
-        "Prefer": "return=representation"  # <-- FIX
-    }
-
-    if extra_headers:
-        headers.update(extra_headers)
-
-    with httpx.Client(timeout=20) as client:
-        r = client.post(
-            url,
-            headers=_headers(
-                apikey=settings.SUPABASE_ANON_KEY,
-                bearer=user_jwt,
-                extra=headers,
-            ),
-            json=json,
-            params=params,
-        )
-
-        if r.status_code >= 400:
-            _handle_error(r)
-
-        return r.json() if r.text else []
+    r = _send(
+        "POST",
+        path,
+        headers=_headers(
+            apikey=settings.SUPABASE_ANON_KEY,
+            bearer=user_jwt,
+            extra=_write_headers(extra_headers),
+        ),
+        json=json,
+        params=params,
+    )
+    return r.json() if r.text else []
 
 
 def sb_patch(
@@ -108,29 +238,18 @@ def sb_patch(
     params: dict | None = None,
     extra_headers: dict[str, str] | None = None,
 ) -> Any:
-    url = _base_url() + path
-
-    headers = {"Prefer": "return=representation"}
-
-    if extra_headers:
-        headers.update(extra_headers)
-
-    with httpx.Client(timeout=20) as client:
-        r = client.patch(
-            url,
-            headers=_headers(
-                apikey=settings.SUPABASE_ANON_KEY,
-                bearer=user_jwt,
-                extra=headers,
-            ),
-            json=json,
-            params=params,
-        )
-
-        if r.status_code >= 400:
-            _handle_error(r)
-
-        return r.json() if r.text else []
+    r = _send(
+        "PATCH",
+        path,
+        headers=_headers(
+            apikey=settings.SUPABASE_ANON_KEY,
+            bearer=user_jwt,
+            extra=_write_headers(extra_headers),
+        ),
+        json=json,
+        params=params,
+    )
+    return r.json() if r.text else []
 
 
 def sb_delete(
@@ -140,28 +259,17 @@ def sb_delete(
     params: dict | None = None,
     extra_headers: dict[str, str] | None = None,
 ) -> Any:
-    url = _base_url() + path
-
-    headers = {"Prefer": "return=representation"}
-
-    if extra_headers:
-        headers.update(extra_headers)
-
-    with httpx.Client(timeout=20) as client:
-        r = client.delete(
-            url,
-            headers=_headers(
-                apikey=settings.SUPABASE_ANON_KEY,
-                bearer=user_jwt,
-                extra=headers,
-            ),
-            params=params,
-        )
-
-        if r.status_code >= 400:
-            _handle_error(r)
-
-        return r.json() if r.text else []
+    r = _send(
+        "DELETE",
+        path,
+        headers=_headers(
+            apikey=settings.SUPABASE_ANON_KEY,
+            bearer=user_jwt,
+            extra=_write_headers(extra_headers),
+        ),
+        params=params,
+    )
+    return r.json() if r.text else []
 
 
 # ---------------------------------------------------------------------------
@@ -175,20 +283,14 @@ def _require_service_key() -> str:
 
 
 def sb_admin_get(path: str, *, params: dict | None = None) -> Any:
-    url = _base_url() + path
     key = _require_service_key()
-
-    with httpx.Client(timeout=20) as client:
-        r = client.get(
-            url,
-            headers=_headers(apikey=key, bearer=key),
-            params=params,
-        )
-
-        if r.status_code >= 400:
-            _handle_error(r)
-
-        return r.json()
+    r = _send(
+        "GET",
+        path,
+        headers=_headers(apikey=key, bearer=key),
+        params=params,
+    )
+    return r.json()
 
 
 def sb_admin_post(
@@ -198,26 +300,15 @@ def sb_admin_post(
     params: dict | None = None,
     extra_headers: dict[str, str] | None = None,
 ) -> Any:
-    url = _base_url() + path
     key = _require_service_key()
-
-    headers = {"Prefer": "return=representation"}
-
-    if extra_headers:
-        headers.update(extra_headers)
-
-    with httpx.Client(timeout=20) as client:
-        r = client.post(
-            url,
-            headers=_headers(apikey=key, bearer=key, extra=headers),
-            json=json,
-            params=params,
-        )
-
-        if r.status_code >= 400:
-            _handle_error(r)
-
-        return r.json() if r.text else []
+    r = _send(
+        "POST",
+        path,
+        headers=_headers(apikey=key, bearer=key, extra=_write_headers(extra_headers)),
+        json=json,
+        params=params,
+    )
+    return r.json() if r.text else []
 
 
 def sb_admin_patch(
@@ -227,26 +318,15 @@ def sb_admin_patch(
     params: dict | None = None,
     extra_headers: dict[str, str] | None = None,
 ) -> Any:
-    url = _base_url() + path
     key = _require_service_key()
-
-    headers = {"Prefer": "return=representation"}
-
-    if extra_headers:
-        headers.update(extra_headers)
-
-    with httpx.Client(timeout=20) as client:
-        r = client.patch(
-            url,
-            headers=_headers(apikey=key, bearer=key, extra=headers),
-            json=json,
-            params=params,
-        )
-
-        if r.status_code >= 400:
-            _handle_error(r)
-
-        return r.json() if r.text else []
+    r = _send(
+        "PATCH",
+        path,
+        headers=_headers(apikey=key, bearer=key, extra=_write_headers(extra_headers)),
+        json=json,
+        params=params,
+    )
+    return r.json() if r.text else []
 
 
 def sb_admin_delete(
@@ -255,22 +335,11 @@ def sb_admin_delete(
     params: dict | None = None,
     extra_headers: dict[str, str] | None = None,
 ) -> Any:
-    url = _base_url() + path
     key = _require_service_key()
-
-    headers = {"Prefer": "return=representation"}
-
-    if extra_headers:
-        headers.update(extra_headers)
-
-    with httpx.Client(timeout=20) as client:
-        r = client.delete(
-            url,
-            headers=_headers(apikey=key, bearer=key, extra=headers),
-            params=params,
-        )
-
-        if r.status_code >= 400:
-            _handle_error(r)
-
-        return r.json() if r.text else []
\ No newline at end of file
+    r = _send(
+        "DELETE",
+        path,
+        headers=_headers(apikey=key, bearer=key, extra=_write_headers(extra_headers)),
+        params=params,
+    )
+    return r.json() if r.text else []
@@ -1,12 +1,26 @@
+import asyncio
+import logging
+import sys
+import time
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.deadline import DeadlineMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.static import SPAStaticFiles
+from app.core.jwks import key_ring, start_jwks_refresher
+from app.db.supabase_async import close_async_client, get_async_client, init_async_client
+from app.db.supabase_http import close_client, init_client
+from app.services.audit_service import audit_queue
+from app.services.staff_directory import staff_directory
 from app.routes.health import router as health_router
+from app.routes.metrics import router as metrics_router
 from app.routes.tasks import router as tasks_router
 from app.routes.status import router as status_router
 from app.routes.tags import router as tags_router
@@ -14,12 +28,66 @@ from app.routes.reports import router as reports_router
 from app.routes.audit import router as audit_router
 from app.routes import me
 from app.routes.auth import router as auth_router
-from app.routes.debug import router as debug_router
 from app.routes.staff import router as staff_router
 
+logger = logging.getLogger(__name__)
+
+
+async def _warm_pool() -> None:
+    # Concurrent requests so the pool holds several open TLS connections.
+    url = settings.SUPABASE_URL.rstrip("/") + "/auth/v1/health"
+    headers = {"apikey": settings.SUPABASE_ANON_KEY}
+    client = get_async_client()
+    await asyncio.gather(*(client.get(url, headers=headers) for _ in range(settings.STARTUP_WARMUP_CONNECTIONS)))
+
+
+async def warm_up() -> None:
+    """Best effort: a failed or slow warmup is logged and the worker starts anyway."""
+    started = time.perf_counter()
+    steps = {"pool": _warm_pool(), "jwks": key_ring.ensure_loaded(), "staff_directory": staff_directory.ensure_fresh()}
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(*steps.values(), return_exceptions=True),
+            timeout=settings.STARTUP_WARMUP_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Startup warmup timed out after %ss", settings.STARTUP_WARMUP_TIMEOUT_SECONDS)
+        return
+    for name, result in zip(steps, results):
+        if isinstance(result, BaseException):
+            logger.warning("Startup warmup of %s failed: %r", name, result)
+    logger.info("Startup warmup finished in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the pooled Supabase clients before serving and close them on shutdown.
+    # Request handlers use the async pool; the sync pool backs scripts and any
+    # remaining blocking callers.
+    init_client()
+    init_async_client()
+    jwks_refresher = start_jwks_refresher()
+    audit_queue.start()
+    if settings.STARTUP_WARMUP:
+        await warm_up()
+    try:
+        yield
+    finally:
+        # Flush buffered audit entries while the HTTP pool is still open.
+        await audit_queue.stop()
+        jwks_refresher.cancel()
+        with suppress(asyncio.CancelledError):
+            await jwks_refresher
+        # Only loaded once a PDF has been exported (see report_service.render_pdf).
+        pdf_report = sys.modules.get("app.services.pdf_report")
+        if pdf_report is not None:
+            pdf_report.shutdown_pdf_pool()
+        await close_async_client()
+        close_client()
+
 
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
+    app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG, lifespan=lifespan)
 
     origins = settings.CORS_ORIGINS
 
@@ -34,10 +102,23 @@ def create_app() -> FastAPI:
         allow_headers=["*"]
     )
 
+    # brotli/gzip for API responses above COMPRESSION_MIN_SIZE
+    app.add_middleware(CompressionMiddleware)
+
+    # Per-request time budget for upstream Supabase calls
+    app.add_middleware(DeadlineMiddleware)
+
+    # Opt-in cProfile/span capture, downloadable from /api/debug/profiles
+    app.add_middleware(ProfilingMiddleware)
+
+    # Outermost, so recorded latency covers every other middleware
+    app.add_middleware(MetricsMiddleware)
+
     # -----------------------------
     # API routes (all under /api)
     # -----------------------------
     app.include_router(health_router, prefix="/api")
+    app.include_router(metrics_router, prefix="/api", tags=["metrics"])
     app.include_router(auth_router, prefix="/api", tags=["auth"])
     app.include_router(tasks_router, prefix="/api/tasks", tags=["tasks"])
     app.include_router(status_router, prefix="/api/status", tags=["status"])
@@ -47,8 +128,11 @@ def create_app() -> FastAPI:
     app.include_router(me.router, prefix="/api", tags=["auth"])
     app.include_router(staff_router, prefix="/api", tags=["staff"])
     app.include_router(audit_router, prefix="/api", tags=["audit"])
-    # Keep this for now while stabilizing
-    app.include_router(debug_router, prefix="/api", tags=["debug"])
+    # Keep this for now while stabilizing; DEBUG_ROUTES=false skips importing it
+    if settings.DEBUG_ROUTES:
+        from app.routes.debug import router as debug_router
+
+        app.include_router(debug_router, prefix="/api", tags=["debug"])
 
     # -----------------------------
     # Serve built frontend (SPA)
@@ -56,12 +140,10 @@ def create_app() -> FastAPI:
     project_root = Path(__file__).resolve().parents[2]
     frontend_dist = project_root / "frontend" / "dist"
 
+    # Hashed assets are immutable; unknown non-API paths fall back to an
+    # in-memory index.html (see app.core.static).
     if frontend_dist.exists():
-        app.mount("/", StaticFiles(directory=frontend_dist, html=True), name="frontend")
-
-        @app.get("/{full_path:path}")
-        def spa_fallback(full_path: str):
-            return FileResponse(frontend_dist / "index.html")
+        app.mount("/", SPAStaticFiles(frontend_dist), name="frontend")
 
     return app
 
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends
 
 from app.core.auth import get_current_user as require_user
-from app.db.supabase_http import sb_get
+from app.core.fastjson import passthrough_json
+from app.db.supabase_async import sb_get_raw
 
 router = APIRouter(prefix="/audit_logs", tags=["audit"])
 
@@ -9,10 +10,10 @@ REST = "/rest/v1"
 
 
 @router.get("")
-def list_audit_logs(actor: dict = Depends(require_user)) -> list[dict]:
+async def list_audit_logs(actor: dict = Depends(require_user)) -> list[dict]:
     jwt = actor["access_token"]
 
-    rows = sb_get(
+    body = await sb_get_raw(
         f"{REST}/audit_logs",
         user_jwt=jwt,
         params={
@@ -22,4 +23,4 @@ def list_audit_logs(actor: dict = Depends(require_user)) -> list[dict]:
         },
     )
 
-    return rows
\ No newline at end of file
+    return passthrough_json(body)
\ No newline at end of file
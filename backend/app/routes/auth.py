@@ -1,9 +1,9 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
-import httpx
 
 from app.core.config import settings
 from app.core.errors import bad_request, unauthorized
+from app.db.supabase_async import get_async_client
 
 router = APIRouter()
 
@@ -14,7 +14,7 @@ class LoginIn(BaseModel):
 
 
 @router.post("/auth/login")
-def login(payload: LoginIn):
+async def login(payload: LoginIn):
     if not settings.SUPABASE_URL:
         bad_request("SUPABASE_URL is not configured.")
     if not settings.SUPABASE_ANON_KEY:
@@ -30,8 +30,7 @@ def login(payload: LoginIn):
     body = {"email": payload.email, "password": payload.password}
 
     try:
-        with httpx.Client(timeout=15) as client:
-            r = client.post(url, headers=headers, json=body)
+        r = await get_async_client().post(url, headers=headers, json=body, timeout=15)
     except Exception:
         unauthorized("Unable to contact Supabase Auth.")
 
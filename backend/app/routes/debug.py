@@ -1,12 +1,22 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse, Response
 
+from app.core.auth import get_current_user, role_cache_stats, token_cache_stats
 from app.core.config import settings
+from app.core.errors import not_found
+from app.core.jwks import key_ring
+from app.core.profiling import profile_store
+from app.core.roles import require_admin
+from app.db.resilience import breaker
+from app.services.audit_service import audit_queue
+from app.services.report_cache import report_cache_stats
+from app.services.staff_directory import staff_directory
 
 router = APIRouter()
 
 
 @router.get("/debug/env")
-def debug_env():
+async def debug_env():
     key = settings.SUPABASE_ANON_KEY or ""
     masked = (key[:8] + "..." + key[-6:]) if len(key) > 20 else "(missing)"
     return {
@@ -16,3 +26,64 @@ def debug_env():
         "JWT_AUDIENCE": settings.JWT_AUDIENCE,
         "SUPABASE_JWT_ALG": settings.SUPABASE_JWT_ALG,
     }
+
+
+@router.get("/debug/cache")
+async def debug_cache():
+    return {
+        "token_cache": token_cache_stats(),
+        "jwks": key_ring.stats(),
+        "role_cache": role_cache_stats(),
+        "report_cache": report_cache_stats(),
+        "staff_directory": staff_directory.stats(),
+    }
+
+
+@router.get("/debug/audit-queue")
+async def debug_audit_queue():
+    return audit_queue.stats()
+
+
+@router.get("/debug/upstream")
+async def debug_upstream():
+    return {"circuit_breaker": breaker.stats()}
+
+
+@router.get("/debug/profiles")
+async def debug_profiles(user=Depends(get_current_user)):
+    require_admin(user)
+    return profile_store.list()
+
+
+def _get_profile(profile_id: str):
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        not_found("Profile not found (it may have been evicted).")
+    return profile
+
+
+# Registered before /debug/profiles/{profile_id}, which would also match.
+@router.get("/debug/profiles/{profile_id}.prof")
+async def debug_profile_download(profile_id: str, user=Depends(get_current_user)):
+    """pstats dump: `python -m pstats <file>` or snakeviz."""
+    require_admin(user)
+    profile = _get_profile(profile_id)
+    if profile.cprofile_bytes is None:
+        not_found("This request was profiled without cProfile (another profile was running).")
+    return Response(
+        profile.cprofile_bytes,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile.id}.prof"'},
+    )
+
+
+@router.get("/debug/profiles/{profile_id}.txt", response_class=PlainTextResponse)
+async def debug_profile_text(profile_id: str, user=Depends(get_current_user)):
+    require_admin(user)
+    return _get_profile(profile_id).top_functions
+
+
+@router.get("/debug/profiles/{profile_id}")
+async def debug_profile(profile_id: str, user=Depends(get_current_user)):
+    require_admin(user)
+    return _get_profile(profile_id).summary()
@@ -6,7 +6,7 @@ router = APIRouter()
 
 
 @router.get("/me")
-def me(user=Depends(get_current_user)):
+async def me(user=Depends(get_current_user)):
     # Frontend trusts this value; backend resolves it (JWT -> DB fallback).
     return {
         "user_id": user.get("user_id"),
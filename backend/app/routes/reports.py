@@ -1,15 +1,17 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from app.core.auth import get_current_user
 from app.core.roles import require_admin
+from app.services.report_cache import cached_report, etag_matches
 from app.services.report_service import (
     export_staff_summary_csv,
     export_staff_summary_pdf,
     export_tag_summary_csv,
     export_tag_summary_pdf,
+    export_tasks_csv,
     export_tasks_summary_csv,
     export_tasks_summary_pdf,
     staff_summary,
@@ -20,48 +22,67 @@ from app.services.report_service import (
 router = APIRouter()
 
 
+def _conditional_json(request: Request, report: dict, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(report, headers=headers)
+
+
 @router.get("/tasks-summary")
-def get_tasks_summary(
+async def get_tasks_summary(
+    request: Request,
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     staff_id: str | None = Query(default=None),
     user=Depends(get_current_user),
 ):
     require_admin(user)
-    return tasks_summary(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    report, etag = await cached_report(
+        "tasks-summary", tasks_summary, user, start_date=start_date, end_date=end_date, staff_id=staff_id
+    )
+    return _conditional_json(request, report, etag)
 
 
 @router.get("/staff-summary")
-def get_staff_summary(
+async def get_staff_summary(
+    request: Request,
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     staff_id: str | None = Query(default=None),
     user=Depends(get_current_user),
 ):
     require_admin(user)
-    return staff_summary(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    report, etag = await cached_report(
+        "staff-summary", staff_summary, user, start_date=start_date, end_date=end_date, staff_id=staff_id
+    )
+    return _conditional_json(request, report, etag)
 
 
 @router.get("/tag-summary")
-def get_tag_summary(
+async def get_tag_summary(
+    request: Request,
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     staff_id: str | None = Query(default=None),
     user=Depends(get_current_user),
 ):
     require_admin(user)
-    return tag_summary(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    report, etag = await cached_report(
+        "tag-summary", tag_summary, user, start_date=start_date, end_date=end_date, staff_id=staff_id
+    )
+    return _conditional_json(request, report, etag)
 
 
 @router.get("/tasks-summary.csv")
-def get_tasks_summary_csv(
+async def get_tasks_summary_csv(
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     staff_id: str | None = Query(default=None),
     user=Depends(get_current_user),
 ):
     require_admin(user)
-    data = export_tasks_summary_csv(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    data = await export_tasks_summary_csv(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
     return StreamingResponse(
         data,
         media_type="text/csv; charset=utf-8",
@@ -70,14 +91,14 @@ def get_tasks_summary_csv(
 
 
 @router.get("/staff-summary.csv")
-def get_staff_summary_csv(
+async def get_staff_summary_csv(
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     staff_id: str | None = Query(default=None),
     user=Depends(get_current_user),
 ):
     require_admin(user)
-    data = export_staff_summary_csv(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    data = await export_staff_summary_csv(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
     return StreamingResponse(
         data,
         media_type="text/csv; charset=utf-8",
@@ -86,14 +107,14 @@ def get_staff_summary_csv(
 
 
 @router.get("/tag-summary.csv")
-def get_tag_summary_csv(
+async def get_tag_summary_csv(
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     staff_id: str | None = Query(default=None),
     user=Depends(get_current_user),
 ):
     require_admin(user)
-    data = export_tag_summary_csv(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    data = await export_tag_summary_csv(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
     return StreamingResponse(
         data,
         media_type="text/csv; charset=utf-8",
@@ -101,15 +122,31 @@ def get_tag_summary_csv(
     )
 
 
+@router.get("/tasks.csv")
+async def get_tasks_csv(
+    start_date: date | None = Query(default=None),
+    end_date: date | None = Query(default=None),
+    staff_id: str | None = Query(default=None),
+    user=Depends(get_current_user),
+):
+    require_admin(user)
+    data = await export_tasks_csv(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    return StreamingResponse(
+        data,
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="tasks.csv"'},
+    )
+
+
 @router.get("/tasks-summary.pdf")
-def get_tasks_summary_pdf(
+async def get_tasks_summary_pdf(
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     staff_id: str | None = Query(default=None),
     user=Depends(get_current_user),
 ):
     require_admin(user)
-    data = export_tasks_summary_pdf(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    data = await export_tasks_summary_pdf(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
     return StreamingResponse(
         data,
         media_type="application/pdf",
@@ -118,14 +155,14 @@ def get_tasks_summary_pdf(
 
 
 @router.get("/staff-summary.pdf")
-def get_staff_summary_pdf(
+async def get_staff_summary_pdf(
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     staff_id: str | None = Query(default=None),
     user=Depends(get_current_user),
 ):
     require_admin(user)
-    data = export_staff_summary_pdf(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    data = await export_staff_summary_pdf(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
     return StreamingResponse(
         data,
         media_type="application/pdf",
@@ -134,14 +171,14 @@ def get_staff_summary_pdf(
 
 
 @router.get("/tag-summary.pdf")
-def get_tag_summary_pdf(
+async def get_tag_summary_pdf(
     start_date: date | None = Query(default=None),
     end_date: date | None = Query(default=None),
     staff_id: str | None = Query(default=None),
     user=Depends(get_current_user),
 ):
     require_admin(user)
-    data = export_tag_summary_pdf(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    data = await export_tag_summary_pdf(user, start_date=start_date, end_date=end_date, staff_id=staff_id)
     return StreamingResponse(
         data,
         media_type="application/pdf",
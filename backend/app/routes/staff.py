@@ -5,11 +5,14 @@ from typing import Any, Dict, List
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
 
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, invalidate_role_cache
 from app.core.config import settings
 from app.core.errors import bad_request, not_found, unauthorized
+from app.core.fastjson import passthrough_json
 from app.core.roles import require_admin
-from app.db.supabase_http import sb_admin_delete, sb_admin_get, sb_admin_patch, sb_admin_post, sb_get
+from app.db.supabase_async import sb_admin_delete, sb_admin_get, sb_admin_patch, sb_admin_post, sb_get, sb_get_raw
+from app.services.report_cache import bump_data_version
+from app.services.staff_directory import staff_directory
 
 router = APIRouter()
 
@@ -44,22 +47,22 @@ class StaffUpdateIn(BaseModel):
     employee_since: str | None = None
 
 
-def _auth_admin_invite(email: str) -> dict:
+async def _auth_admin_invite(email: str) -> dict:
     if not settings.SUPABASE_URL:
         bad_request("SUPABASE_URL is not configured.")
     if not settings.SUPABASE_SERVICE_ROLE_KEY:
         bad_request("SUPABASE_SERVICE_ROLE_KEY is not configured.")
 
-    rows = sb_admin_post("/auth/v1/invite", json={"email": email})
+    rows = await sb_admin_post("/auth/v1/invite", json={"email": email})
     if not isinstance(rows, dict) or not rows.get("id"):
         unauthorized("Invite failed (no user id returned).")
     return rows
 
 
 @router.get("/staff", response_model=List[Dict[str, Any]])
-def list_staff(user=Depends(get_current_user)):
+async def list_staff(user=Depends(get_current_user)):
     require_admin(user)
-    rows = sb_get(
+    body = await sb_get_raw(
         "/rest/v1/profiles",
         user_jwt=user.get("access_token"),
         params={
@@ -68,13 +71,13 @@ def list_staff(user=Depends(get_current_user)):
             "order": "full_name.asc.nullslast",
         },
     )
-    return rows
+    return passthrough_json(body)
 
 
 @router.get("/staff/{staff_id}", response_model=Dict[str, Any])
-def get_staff(staff_id: str, user=Depends(get_current_user)):
+async def get_staff(staff_id: str, user=Depends(get_current_user)):
     require_admin(user)
-    rows = sb_get(
+    rows = await sb_get(
         "/rest/v1/profiles",
         user_jwt=user.get("access_token"),
         params={
@@ -89,9 +92,9 @@ def get_staff(staff_id: str, user=Depends(get_current_user)):
 
 
 @router.post("/staff/invite", response_model=Dict[str, Any])
-def invite_staff(payload: StaffInviteIn, user=Depends(get_current_user)):
+async def invite_staff(payload: StaffInviteIn, user=Depends(get_current_user)):
     require_admin(user)
-    invited = _auth_admin_invite(payload.email.strip().lower())
+    invited = await _auth_admin_invite(payload.email.strip().lower())
     user_id = invited["id"]
 
     profile_row = {
@@ -109,17 +112,21 @@ def invite_staff(payload: StaffInviteIn, user=Depends(get_current_user)):
         "employee_since": payload.employee_since,
     }
 
-    out = sb_admin_post(
+    out = await sb_admin_post(
         "/rest/v1/profiles",
         json=[profile_row],
         params={"select": _PROFILE_SELECT, "on_conflict": "id"},
         extra_headers={"Prefer": "resolution=merge-duplicates,return=representation"},
     )
 
+    invalidate_role_cache(user_id)
+    staff_directory.invalidate(user_id)
+    bump_data_version()
+
     if isinstance(out, list) and out:
         return out[0]
 
-    fetched = sb_admin_get(
+    fetched = await sb_admin_get(
         "/rest/v1/profiles",
         params={"select": _PROFILE_SELECT, "id": f"eq.{user_id}", "limit": 1},
     )
@@ -130,13 +137,13 @@ def invite_staff(payload: StaffInviteIn, user=Depends(get_current_user)):
 
 
 @router.patch("/staff/{staff_id}", response_model=Dict[str, Any])
-def update_staff(staff_id: str, payload: StaffUpdateIn, user=Depends(get_current_user)):
+async def update_staff(staff_id: str, payload: StaffUpdateIn, user=Depends(get_current_user)):
     require_admin(user)
     patch = {key: value for key, value in payload.model_dump().items() if value is not None}
     if not patch:
         bad_request("No fields provided for update.")
 
-    rows = sb_admin_patch(
+    rows = await sb_admin_patch(
         "/rest/v1/profiles",
         json=patch,
         params={"id": f"eq.{staff_id}", "select": _PROFILE_SELECT},
@@ -144,13 +151,16 @@ def update_staff(staff_id: str, payload: StaffUpdateIn, user=Depends(get_current
     )
     if not rows:
         not_found("Staff not found.")
+    invalidate_role_cache(staff_id)
+    staff_directory.invalidate(staff_id)
+    bump_data_version()
     return rows[0]
 
 
 @router.delete("/staff/{staff_id}")
-def delete_staff(staff_id: str, user=Depends(get_current_user)):
+async def delete_staff(staff_id: str, user=Depends(get_current_user)):
     require_admin(user)
-    rows = sb_admin_patch(
+    rows = await sb_admin_patch(
         "/rest/v1/profiles",
         json={"employment_status": "Inactive", "availability": "Leave"},
         params={"id": f"eq.{staff_id}", "select": _PROFILE_SELECT},
@@ -158,9 +168,12 @@ def delete_staff(staff_id: str, user=Depends(get_current_user)):
     )
     if not rows:
         not_found("Staff not found.")
+    invalidate_role_cache(staff_id)
+    staff_directory.invalidate(staff_id)
+    bump_data_version()
 
     try:
-        sb_admin_delete(f"/auth/v1/admin/users/{staff_id}", params={"should_soft_delete": "true"})
+        await sb_admin_delete(f"/auth/v1/admin/users/{staff_id}", params={"should_soft_delete": "true"})
     except Exception:
         pass
 
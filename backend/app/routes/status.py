@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
 
 from app.core.auth import get_current_user
-from app.services.status_service import add_status_update, list_status_updates
+from app.services.status_service import add_status_update, add_status_updates_batch, list_status_updates
 
 router = APIRouter()
 
@@ -11,10 +11,22 @@ class StatusUpdateIn(BaseModel):
     status: str = Field(min_length=1, max_length=40)
     note: str | None = Field(default=None, max_length=1000)
 
+class StatusBatchIn(BaseModel):
+    items: list[StatusUpdateIn] = Field(min_length=1, max_length=200)
+
 @router.post("")
-def post_status(payload: StatusUpdateIn, user=Depends(get_current_user)):
-    return add_status_update(payload.task_id, payload.status, payload.note, user)
+async def post_status(payload: StatusUpdateIn, user=Depends(get_current_user)):
+    return await add_status_update(payload.task_id, payload.status, payload.note, user)
+
+@router.post("/batch")
+async def post_status_batch(payload: StatusBatchIn, user=Depends(get_current_user)):
+    results = await add_status_updates_batch([item.model_dump() for item in payload.items], user)
+    return {
+        "updated": sum(1 for r in results if r["ok"]),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "results": results,
+    }
 
 @router.get("/{task_id}")
-def get_status(task_id: str, user=Depends(get_current_user)):
-    return {"items": list_status_updates(task_id, user)}
+async def get_status(task_id: str, user=Depends(get_current_user)):
+    return {"items": await list_status_updates(task_id, user)}
@@ -9,18 +9,18 @@ router = APIRouter()
 
 
 @router.get("", response_model=list[TagOut])
-def get_tags(user=Depends(get_current_user)):
-    return list_tags(user["access_token"])
+async def get_tags(user=Depends(get_current_user)):
+    return await list_tags(user["access_token"])
 
 
 @router.post("", response_model=TagOut)
-def post_tag(payload: TagCreate, user=Depends(get_current_user)):
+async def post_tag(payload: TagCreate, user=Depends(get_current_user)):
     require_admin(user)
-    return create_tag(payload.name, user["access_token"], user)
+    return await create_tag(payload.name, user["access_token"], user)
 
 
 @router.delete("/{tag_id}")
-def remove_tag(tag_id: str, user=Depends(get_current_user)):
+async def remove_tag(tag_id: str, user=Depends(get_current_user)):
     require_admin(user)
-    delete_tag(tag_id, user["access_token"], user)
+    await delete_tag(tag_id, user["access_token"], user)
     return {"deleted": True}
\ No newline at end of file
@@ -1,13 +1,15 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Response
 from pydantic import BaseModel
 
 from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.fastjson import trusted_json
 from app.core.roles import require_admin
-from app.schemas.task import TaskCreate, TaskListOut, TaskOut
-from app.services.task_service import create_task, get_task, list_tasks, set_task_tags, update_task_basic
-from app.services.task_service import delete_task
+from app.schemas.task import TaskBulkCreate, TaskBulkOut, TaskCreate, TaskListOut, TaskOut
+from app.services.task_service import create_task, create_tasks_bulk, get_task, list_tasks, set_task_tags, update_task_basic
+from app.services.task_service import delete_task, task_version
 
 router = APIRouter()
 
@@ -26,34 +28,85 @@ class TaskPatch(BaseModel):
 
 
 @router.get("", response_model=TaskListOut)
-def get_tasks(user=Depends(get_current_user)):
-    return {"items": list_tasks(user)}
+async def get_tasks(
+    limit: int = Query(default=settings.TASKS_PAGE_SIZE, ge=1, le=settings.TASKS_MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None),
+    status: str | None = Query(default=None),
+    priority: str | None = Query(default=None),
+    assigned_to: str | None = Query(default=None),
+    due_from: date | None = Query(default=None),
+    due_to: date | None = Query(default=None),
+    tag_id: str | None = Query(default=None),
+    user=Depends(get_current_user),
+):
+    items, next_cursor = await list_tasks(
+        user,
+        limit=limit,
+        cursor=cursor,
+        status=status,
+        priority=priority,
+        assigned_to=assigned_to,
+        due_from=due_from,
+        due_to=due_to,
+        tag_id=tag_id,
+    )
+    # Rows are selected with exactly TaskOut's columns.
+    return trusted_json({"items": items, "next_cursor": next_cursor})
 
 
 @router.post("", response_model=TaskOut)
-def post_task(payload: TaskCreate, user=Depends(get_current_user)):
+async def post_task(payload: TaskCreate, user=Depends(get_current_user)):
     require_admin(user)
-    return create_task(payload.model_dump(), user)
+    return await create_task(payload.model_dump(), user)
+
+
+@router.post("/bulk", response_model=TaskBulkOut)
+async def post_tasks_bulk(payload: TaskBulkCreate, user=Depends(get_current_user)):
+    require_admin(user)
+    results = await create_tasks_bulk([item.model_dump() for item in payload.items], user)
+    return {
+        "created": sum(1 for r in results if r["status"] == "created"),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
+    }
 
 
 @router.get("/{task_id}", response_model=TaskOut)
-def get_task_detail(task_id: str, user=Depends(get_current_user)):
-    return get_task(task_id, user)
+async def get_task_detail(task_id: str, response: Response, user=Depends(get_current_user)):
+    task = await get_task(task_id, user)
+    response.headers["ETag"] = task_version(task)
+    return task
 
 
 @router.patch("/{task_id}", response_model=TaskOut)
-def patch_task(task_id: str, payload: TaskPatch, user=Depends(get_current_user)):
+async def patch_task(
+    task_id: str,
+    payload: TaskPatch,
+    response: Response,
+    if_match: str | None = Header(default=None),
+    user=Depends(get_current_user),
+):
     require_admin(user)
     patch = {key: value for key, value in payload.model_dump().items() if value is not None}
-    return update_task_basic(task_id, patch, user)
+    task = await update_task_basic(task_id, patch, user, if_match=if_match)
+    response.headers["ETag"] = task_version(task)
+    return task
 
 
 @router.put("/{task_id}/tags")
-def put_task_tags(task_id: str, payload: TaskTagUpdate, user=Depends(get_current_user)):
+async def put_task_tags(task_id: str, payload: TaskTagUpdate, user=Depends(get_current_user)):
     require_admin(user)
-    return set_task_tags(task_id, payload.tag_ids, user)
+    return await set_task_tags(task_id, payload.tag_ids, user)
 
 @router.delete("/{task_id}", response_model=TaskOut)
-def remove_task(task_id: str, user=Depends(get_current_user)):
+async def remove_task(
+    task_id: str,
+    response: Response,
+    if_match: str | None = Header(default=None),
+    user=Depends(get_current_user),
+):
     require_admin(user)
-    return delete_task(task_id, user)
\ No newline at end of file
+    task = await delete_task(task_id, user, if_match=if_match)
+    response.headers["ETag"] = task_version(task)
+    return task
\ No newline at end of file
@@ -25,4 +25,23 @@ class TaskOut(BaseModel):
 
 
 class TaskListOut(BaseModel):
-    items: list[TaskOut]
\ No newline at end of file
+    items: list[TaskOut]
+    next_cursor: str | None = None
+
+
+class TaskBulkCreate(BaseModel):
+    items: list[TaskCreate] = Field(min_length=1, max_length=500)
+
+
+class TaskBulkItemOut(BaseModel):
+    index: int
+    status: str
+    task: TaskOut | None = None
+    error: str | None = None
+
+
+class TaskBulkOut(BaseModel):
+    created: int
+    duplicates: int
+    failed: int
+    results: list[TaskBulkItemOut]
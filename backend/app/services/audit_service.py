@@ -1,9 +1,308 @@
-from app.db.supabase_http import sb_post
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.errors import error_message
+from app.db.supabase_async import sb_admin_post, sb_post
+
+logger = logging.getLogger(__name__)
 
 REST = "/rest/v1"
 
 
-def log_audit(
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _is_transient(exc: Exception) -> bool:
+    """
+    Whether a failed post may succeed later: upstream 5xx (transport errors
+    surface as 502/503/504), 408 and 429. Any other 4xx rejects the payload
+    itself and would fail the same way on every retry.
+    """
+    if isinstance(exc, HTTPException):
+        return exc.status_code >= 500 or exc.status_code in (408, 429)
+    return True
+
+
+async def _post_batch(batch: list[dict]) -> None:
+    await sb_admin_post(
+        f"{REST}/audit_logs",
+        json=batch,
+        extra_headers={"Prefer": "return=minimal"},
+    )
+
+
+class AuditQueue:
+    """
+    Write-behind buffer for audit_logs.
+
+    Entries are flushed as one bulk-array POST every `flush_interval` seconds
+    or as soon as `batch_size` entries are waiting. Memory is bounded by
+    `max_pending`; overflow and batches that fail with a transient error are
+    appended to a per-process JSONL spill file and replayed after the next
+    successful flush. A batch Supabase rejects outright (4xx) is split in half
+    until the bad entries are isolated; those go to a `.rejected` file for
+    inspection and everything else is still delivered.
+    """
+
+    def __init__(self, *, batch_size: int, flush_interval: float, max_pending: int, spill_path: Path | None):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max(self.batch_size, max_pending)
+        self.spill_path = spill_path
+
+        self.enqueued = 0
+        self.flushed = 0
+        self.spilled = 0
+        self.rejected = 0
+        self.failed_flushes = 0
+
+        self._pending: deque[dict] = deque()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def enqueue(self, entry: dict) -> None:
+        self.enqueued += 1
+        if len(self._pending) >= self.max_pending:
+            self._spill([entry])
+            return
+
+        self._pending.append(entry)
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        while self._pending:
+            size = min(self.batch_size, len(self._pending))
+            batch = [self._pending.popleft() for _ in range(size)]
+            try:
+                unsent = await self._deliver(batch)
+            except asyncio.CancelledError:
+                self._pending.extendleft(reversed(batch))
+                raise
+            if unsent:
+                self.failed_flushes += 1
+                logger.warning("Audit flush of %s entries failed; spilling to disk", len(unsent))
+                self._spill(unsent)
+                return
+
+        await self._replay_spill()
+
+    async def _deliver(self, batch: list[dict]) -> list[dict]:
+        """
+        Posts `batch`, bisecting it on a permanent rejection. Returns the
+        entries left unsent by a transient failure (empty when everything was
+        posted or rejected).
+        """
+        try:
+            await _post_batch(batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            if _is_transient(exc):
+                return batch
+            if len(batch) == 1:
+                self._reject(batch[0], exc)
+                return []
+            middle = len(batch) // 2
+            unsent = await self._deliver(batch[:middle])
+            if unsent:
+                return unsent + batch[middle:]
+            return await self._deliver(batch[middle:])
+        self.flushed += len(batch)
+        return []
+
+    # -- spill file --------------------------------------------------------
+    #
+    # Each worker process owns `<stem>.<pid><suffix>` and `<stem>.<pid>.replay`
+    # next to AUDIT_SPILL_PATH, so workers never append to or rename each
+    # other's files. Files left by processes that are no longer alive (and the
+    # unsuffixed legacy file) are adopted by the next worker that replays.
+
+    def _own(self, suffix: str) -> Path:
+        assert self.spill_path is not None
+        return self.spill_path.with_name(f"{self.spill_path.stem}.{os.getpid()}{suffix}")
+
+    def _orphaned_files(self) -> list[Path]:
+        assert self.spill_path is not None
+        stem, spill_suffix = self.spill_path.stem, self.spill_path.suffix
+        orphans = [self.spill_path, self.spill_path.with_suffix(".replay")]
+        for path in self.spill_path.parent.glob(f"{stem}.*"):
+            pid, _, suffix = path.name[len(stem) + 1:].partition(".")
+            if pid.isdigit() and "." + suffix in (spill_suffix, ".replay", ".claim") and not _pid_alive(int(pid)):
+                orphans.append(path)
+        return orphans
+
+    def _reject(self, entry: dict, exc: Exception) -> None:
+        self.rejected += 1
+        reason = error_message(exc) if isinstance(exc, HTTPException) else repr(exc)
+        if not self.spill_path:
+            logger.error("Dropping audit entry rejected by Supabase (%s): %.200s", reason, entry)
+            return
+        # Shared by all workers; single short appends do not interleave.
+        path = self.spill_path.with_name(f"{self.spill_path.stem}.rejected{self.spill_path.suffix}")
+        logger.error("Audit entry rejected by Supabase (%s); moved to %s", reason, path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as fh:
+                fh.write(json.dumps({"error": reason, "entry": entry}, default=str) + "\n")
+        except OSError:
+            logger.exception("Could not write rejected audit entry to %s", path)
+
+    def _spill(self, entries: list[dict]) -> None:
+        if not self.spill_path:
+            logger.error("Dropping %s audit entries (no spill path configured)", len(entries))
+            return
+        path = self._own(self.spill_path.suffix)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as fh:
+                for entry in entries:
+                    fh.write(json.dumps(entry, default=str) + "\n")
+            self.spilled += len(entries)
+        except OSError:
+            logger.exception("Could not spill %s audit entries to %s", len(entries), path)
+
+    def _claim_spill(self) -> Path | None:
+        """
+        Moves this worker's spill file and any orphaned ones into its .replay
+        file, appending to a .replay left by an interrupted replay instead of
+        overwriting it. Returns the .replay path, or None when there is nothing
+        to replay.
+        """
+        replaying = self._own(".replay")
+        claim = self._own(".claim")
+        for source in [self._own(self.spill_path.suffix), *self._orphaned_files()]:
+            if source in (replaying, claim):
+                continue
+            try:
+                # Atomic: when two workers adopt the same orphan, one wins.
+                os.replace(source, claim)
+            except FileNotFoundError:
+                continue
+            data = claim.read_bytes()
+            if data and not data.endswith(b"\n"):
+                data += b"\n"  # keep a torn last line from swallowing the next file's first
+            with replaying.open("ab") as out:
+                out.write(data)
+            claim.unlink(missing_ok=True)
+        return replaying if replaying.exists() else None
+
+    async def _replay_spill(self) -> None:
+        if not self.spill_path or not self.spill_path.parent.exists():
+            return
+        try:
+            replaying = self._claim_spill()
+            if replaying is None:
+                return
+            lines = replaying.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            logger.exception("Could not read audit spill files in %s", self.spill_path.parent)
+            return
+
+        entries = []
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A torn write from a crashed worker; keep the rest.
+                logger.error("Skipping unreadable audit spill line %s in %s: %.200s", number, replaying, line)
+
+        for start in range(0, len(entries), self.batch_size):
+            batch = entries[start:start + self.batch_size]
+            try:
+                unsent = await self._deliver(batch)
+            except asyncio.CancelledError:
+                # Keep only what was not posted, for the next replay.
+                replaying.write_text("".join(json.dumps(e, default=str) + "\n" for e in entries[start:]), encoding="utf-8")
+                raise
+            if unsent:
+                self._spill(unsent + entries[start + len(batch):])
+                break
+
+        replaying.unlink(missing_ok=True)
+
+    # -- lifecycle ---------------------------------------------------------
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Never let one bad flush kill the flusher; pending entries stay queued.
+                logger.exception("Audit flush failed")
+
+    def start(self) -> None:
+        if self.running:
+            return
+        if not settings.SUPABASE_SERVICE_ROLE_KEY:
+            # Batches are posted with the service key; without it every batch
+            # would fail and spill, so log_audit keeps writing through instead.
+            logger.warning("SUPABASE_SERVICE_ROLE_KEY is not set; audit entries are written through, not batched")
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "spilled": self.spilled,
+            "rejected": self.rejected,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+audit_queue = AuditQueue(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+    max_pending=settings.AUDIT_MAX_PENDING,
+    spill_path=Path(settings.AUDIT_SPILL_PATH) if settings.AUDIT_SPILL_PATH else None,
+)
+
+
+async def log_audit(
     *,
     actor: dict,
     action: str,
@@ -21,10 +320,17 @@ def log_audit(
         "entity_id": entity_id,
         "old_data": old_data,
         "new_data": new_data,
+        # Stamp now so buffered or replayed entries keep their real time.
+        "created_at": datetime.now(timezone.utc).isoformat(),
     }
 
-    sb_post(
+    if audit_queue.running:
+        audit_queue.enqueue(payload)
+        return
+
+    # No flusher (scripts, tests without the app lifespan): write through.
+    await sb_post(
         f"{REST}/audit_logs",
         user_jwt=jwt,
         json=payload,
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import io
+from typing import TYPE_CHECKING, Any
+from xml.sax.saxutils import escape
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# Rows per platypus Table. Each chunk fits on roughly one page, so splitting
+# never has to re-measure a huge table and per-page memory stays bounded.
+_ROWS_PER_TABLE = 40
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def render_report_pdf(spec: dict[str, Any]) -> bytes:
+    """
+    Render a tabular report to PDF bytes.
+
+    `spec` keys: title, generated_at, filters (dict), columns (list[str]),
+    rows (list[list]) and optional summary (list of (label, value) pairs).
+    Runs in a worker process, so it only takes and returns plain data.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    title = str(spec.get("title") or "Report")
+    generated_at = str(spec.get("generated_at") or "")
+
+    def _on_page(pdf, doc):
+        pdf.saveState()
+        pdf.setFont("Helvetica", 8)
+        pdf.drawString(doc.leftMargin, letter[1] - 0.5 * inch, f"Cardinal LibTask - {title}")
+        pdf.drawRightString(letter[0] - doc.rightMargin, 0.5 * inch, f"Page {doc.page}")
+        if generated_at:
+            pdf.drawString(doc.leftMargin, 0.5 * inch, f"Generated {generated_at}")
+        pdf.restoreState()
+
+    table_style = TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#7a1f1f")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f4f4f4")]),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]
+    )
+
+    story: list[Any] = [Paragraph(escape(title), styles["Title"])]
+
+    filters = {k: v for k, v in (spec.get("filters") or {}).items() if v}
+    if filters:
+        text = ", ".join(f"{k.replace('_', ' ')}: {escape(str(v))}" for k, v in filters.items())
+        story.append(Paragraph(text, styles["Normal"]))
+
+    for label, value in spec.get("summary") or []:
+        story.append(Paragraph(f"<b>{escape(str(label))}:</b> {escape(str(value))}", styles["Normal"]))
+    story.append(Spacer(1, 0.2 * inch))
+
+    columns = [str(c) for c in spec.get("columns") or []]
+    rows = spec.get("rows") or []
+
+    if not rows:
+        story.append(Paragraph("No data for the selected filters.", styles["Italic"]))
+
+    for start in range(0, len(rows), _ROWS_PER_TABLE):
+        chunk = [["" if v is None else str(v) for v in row] for row in rows[start:start + _ROWS_PER_TABLE]]
+        table = Table([columns, *chunk], repeatRows=1, hAlign="LEFT")
+        table.setStyle(table_style)
+        story.append(table)
+
+    out = io.BytesIO()
+    doc = SimpleDocTemplate(
+        out,
+        pagesize=letter,
+        title=title,
+        topMargin=0.8 * inch,
+        bottomMargin=0.8 * inch,
+    )
+    doc.build(story, onFirstPage=_on_page, onLaterPages=_on_page)
+    return out.getvalue()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        # Imported on first PDF export; most workers never render one.
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # spawn keeps workers free of the parent's event loop and sockets.
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+async def render_pdf(spec: dict[str, Any]) -> bytes:
+    """Render off the event loop: in the process pool, or a thread if PDF_WORKERS=0."""
+    if settings.PDF_WORKERS <= 0:
+        return await asyncio.to_thread(render_report_pdf, spec)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), render_report_pdf, spec)
+
+
+def shutdown_pdf_pool() -> None:
+    global _executor
+
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
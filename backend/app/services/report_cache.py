@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Bumped by every task/status/tag write in this process. Cache keys include
+# the version seen when a report started building, so a report computed
+# across a concurrent write is never served under the newer version. Writes
+# made by other workers are bounded by REPORT_CACHE_TTL_SECONDS.
+_data_version = 0
+_version_lock = threading.Lock()
+
+_REPORT_CACHE = TTLCache(
+    maxsize=settings.REPORT_CACHE_SIZE,
+    ttl=settings.REPORT_CACHE_TTL_SECONDS,
+)
+
+
+def data_version() -> int:
+    return _data_version
+
+
+def bump_data_version() -> None:
+    global _data_version
+
+    with _version_lock:
+        _data_version += 1
+    _REPORT_CACHE.clear()
+
+
+def _etag_for(report: dict) -> str:
+    # generated_at changes on every rebuild; the ETag should only track data.
+    body = {k: v for k, v in report.items() if k != "generated_at"}
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+async def cached_report(
+    name: str,
+    builder: Callable[..., Awaitable[dict]],
+    actor: dict,
+    *,
+    start_date=None,
+    end_date=None,
+    staff_id=None,
+) -> tuple[dict, str]:
+    """Return (report, etag), building the report only on a cache miss."""
+    key = (
+        name,
+        start_date.isoformat() if start_date else None,
+        end_date.isoformat() if end_date else None,
+        staff_id,
+        data_version(),
+    )
+
+    entry = _REPORT_CACHE.get(key)
+    if entry is not None:
+        return entry[0], entry[1]
+
+    report = await builder(actor, start_date=start_date, end_date=end_date, staff_id=staff_id)
+    etag = _etag_for(report)
+    size = len(json.dumps(report, default=str))
+    _REPORT_CACHE.set(key, (report, etag, size))
+    return report, etag
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    # Weak comparison: W/"x" and "x" name the same representation.
+    bare = etag.removeprefix("W/")
+    return "*" in candidates or etag in candidates or bare in candidates
+
+
+def report_cache_stats() -> dict[str, Any]:
+    stats = _REPORT_CACHE.stats()
+    stats["data_version"] = _data_version
+    stats["approx_bytes"] = sum(entry[2] for entry in _REPORT_CACHE.values())
+    return stats
@@ -2,16 +2,18 @@ from __future__ import annotations
 
 import csv
 import io
+import time
 from collections import defaultdict
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
+from fastapi import HTTPException
 
 from app.core.errors import forbidden
-from app.db.supabase_http import sb_get
+from app.core.config import settings
+from app.db.supabase_async import sb_get, sb_post
 from app.services.audit_service import log_audit
+from app.services.staff_directory import staff_directory
+from app.services.task_service import keyset_filter, encode_cursor
 
 REST = "/rest/v1"
 
@@ -25,6 +27,11 @@ DISPLAY_STATUS = {
 }
 CLOSED_STATUSES = {"done", "cancelled"}
 
+# RPCs from migration 011. A missing function (PostgREST 404) switches that
+# report to the row-scanning fallback until this many seconds have passed.
+_RPC_RETRY_SECONDS = 300
+_rpc_unavailable_until: dict[str, float] = {}
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -49,35 +56,111 @@ def _filters_block(start_date, end_date, staff_id):
 
 def _task_params(start_date, end_date, staff_id, *, select):
     params = {"select": select}
+    # Inclusive calendar-day range as a half-open created_at range, the same
+    # bounds the report RPCs use.
+    parts = []
     if start_date:
-        params["created_at"] = f"gte.{start_date.isoformat()}"
+        parts.append(f"created_at.gte.{start_date.isoformat()}")
     if end_date:
-        params["created_at"] = f"lte.{end_date.isoformat()}"
+        parts.append(f"created_at.lt.{(end_date + timedelta(days=1)).isoformat()}")
+    if parts:
+        params["and"] = f"({','.join(parts)})"
     if staff_id:
         params["assigned_to"] = f"eq.{staff_id}"
     return params
 
 
-# =========================
-# SUMMARY FUNCTIONS
-# =========================
+def _rpc_args(start_date, end_date, staff_id) -> dict:
+    return {
+        "p_start_date": start_date.isoformat() if start_date else None,
+        "p_end_date": end_date.isoformat() if end_date else None,
+        "p_staff_id": staff_id,
+    }
 
-def tasks_summary(actor, start_date=None, end_date=None, staff_id=None):
-    jwt = _admin_jwt(actor)
-
-    rows = sb_get(
-        f"{REST}/tasks",
-        user_jwt=jwt,
-        params=_task_params(start_date, end_date, staff_id, select="status"),
-    )
 
+async def _call_report_rpc(name: str, jwt: str, start_date, end_date, staff_id) -> list[dict] | None:
+    """
+    Run a grouped-count RPC. Returns None when the function is not deployed
+    (or disabled) so callers can fall back to scanning task rows.
+    """
+    if not settings.REPORTS_USE_RPC:
+        return None
+    if _rpc_unavailable_until.get(name, 0) > time.monotonic():
+        return None
+
+    try:
+        return await sb_post(
+            f"{REST}/rpc/{name}",
+            user_jwt=jwt,
+            json=_rpc_args(start_date, end_date, staff_id),
+        )
+    except HTTPException as exc:
+        if exc.status_code != 404:
+            raise
+        _rpc_unavailable_until[name] = time.monotonic() + _RPC_RETRY_SECONDS
+        return None
+
+
+async def _status_counts(jwt, start_date, end_date, staff_id) -> dict[str, int]:
     counts = defaultdict(int)
     for status in CANONICAL_STATUSES:
         counts[status] = 0
 
+    grouped = await _call_report_rpc("report_task_status_counts", jwt, start_date, end_date, staff_id)
+    if grouped is not None:
+        for row in grouped:
+            status = (row.get("status") or "pending").lower()
+            counts[status] += int(row.get("count") or 0)
+        return counts
+
+    rows = await sb_get(
+        f"{REST}/tasks",
+        user_jwt=jwt,
+        params=_task_params(start_date, end_date, staff_id, select="status"),
+    )
     for row in rows:
         status = (row.get("status") or "pending").lower()
         counts[status] += 1
+    return counts
+
+
+async def _staff_counts(jwt, start_date, end_date, staff_id) -> dict[str, dict]:
+    stats = defaultdict(lambda: {"total_tasks": 0, "open_tasks": 0, "closed_tasks": 0})
+
+    grouped = await _call_report_rpc("report_staff_status_counts", jwt, start_date, end_date, staff_id)
+    if grouped is not None:
+        rows = grouped
+    else:
+        rows = await sb_get(
+            f"{REST}/tasks",
+            user_jwt=jwt,
+            params=_task_params(start_date, end_date, staff_id, select="assigned_to,status"),
+        )
+
+    for t in rows:
+        sid = t.get("assigned_to")
+        if not sid:
+            continue
+
+        n = int(t.get("count") or 0) if grouped is not None else 1
+        stats[sid]["total_tasks"] += n
+
+        status = (t.get("status") or "pending").lower()
+        if status in CLOSED_STATUSES:
+            stats[sid]["closed_tasks"] += n
+        else:
+            stats[sid]["open_tasks"] += n
+
+    return stats
+
+
+# =========================
+# SUMMARY FUNCTIONS
+# =========================
+
+async def tasks_summary(actor, start_date=None, end_date=None, staff_id=None):
+    jwt = _admin_jwt(actor)
+    counts = await _status_counts(jwt, start_date, end_date, staff_id)
 
     by_status = [
         {"key": s, "label": DISPLAY_STATUS[s], "count": counts[s]}
@@ -94,62 +177,57 @@ def tasks_summary(actor, start_date=None, end_date=None, staff_id=None):
     }
 
 
-def staff_summary(actor, start_date=None, end_date=None, staff_id=None):
+async def staff_summary(actor, start_date=None, end_date=None, staff_id=None):
     jwt = _admin_jwt(actor)
+    stats = await _staff_counts(jwt, start_date, end_date, staff_id)
 
-    tasks = sb_get(
-        f"{REST}/tasks",
-        user_jwt=jwt,
-        params=_task_params(start_date, end_date, staff_id, select="assigned_to,status"),
-    )
-
-    stats = defaultdict(lambda: {"total_tasks": 0, "open_tasks": 0, "closed_tasks": 0})
-
-    for t in tasks:
-        sid = t.get("assigned_to")
-        if not sid:
-            continue
-
-        stats[sid]["total_tasks"] += 1
-
-        status = (t.get("status") or "pending").lower()
-        if status in CLOSED_STATUSES:
-            stats[sid]["closed_tasks"] += 1
-        else:
-            stats[sid]["open_tasks"] += 1
+    await staff_directory.ensure_fresh(jwt)
+    items = []
+    for key, counts in stats.items():
+        profile = await staff_directory.get(key, jwt) or {}
+        items.append({"staff_id": key, "full_name": profile.get("full_name"), "email": profile.get("email"), **counts})
 
     return {
         "generated_at": _now_iso(),
         "filters": _filters_block(start_date, end_date, staff_id),
-        "items": [{"staff_id": k, **v} for k, v in stats.items()],
+        "items": items,
     }
 
 
-def tag_summary(actor, start_date=None, end_date=None, staff_id=None):
-    jwt = _admin_jwt(actor)
-
-    tasks = sb_get(
-        f"{REST}/tasks",
-        user_jwt=jwt,
-        params=_task_params(start_date, end_date, staff_id, select="id"),
-    )
-    task_ids = [t["id"] for t in tasks if t.get("id")]
+async def _iter_tag_links(jwt, start_date, end_date, staff_id):
+    """
+    Yield task_tags rows with the tag name embedded, restricted to matching
+    tasks through an inner-joined `tasks` embed. Filters travel as embedded
+    params, so the URL stays small however many tasks match, and links are
+    paged by their (task_id, tag_id) primary key.
+    """
+    task_filters = _task_params(start_date, end_date, staff_id, select="id")
+    task_filters.pop("select")
+
+    params = {
+        "select": "task_id,tag_id,tags(name),tasks!inner(id)",
+        "order": "task_id.asc,tag_id.asc",
+        "limit": settings.EXPORT_PAGE_SIZE,
+    }
+    params.update({f"tasks.{key}": value for key, value in task_filters.items()})
 
-    if not task_ids:
-        return {"generated_at": _now_iso(), "filters": {}, "items": []}
+    while True:
+        page = await sb_get(f"{REST}/task_tags", user_jwt=jwt, params=params)
+        for row in page:
+            yield row
+        if len(page) < settings.EXPORT_PAGE_SIZE:
+            return
+        last = page[-1]
+        params["or"] = f"(task_id.gt.{last['task_id']},and(task_id.eq.{last['task_id']},tag_id.gt.{last['tag_id']}))"
 
-    tags = sb_get(f"{REST}/tags", user_jwt=jwt, params={"select": "id,name"})
-    tag_map = {t["id"]: t["name"] for t in tags}
 
-    joins = sb_get(
-        f"{REST}/task_tags",
-        user_jwt=jwt,
-        params={"task_id": f"in.({','.join(task_ids)})"},
-    )
+async def tag_summary(actor, start_date=None, end_date=None, staff_id=None):
+    jwt = _admin_jwt(actor)
 
     counts = defaultdict(int)
-    for j in joins:
-        counts[tag_map.get(j["tag_id"], "unknown")] += 1
+    async for link in _iter_tag_links(jwt, start_date, end_date, staff_id):
+        tag = link.get("tags") or {}
+        counts[tag.get("name") or "unknown"] += 1
 
     return {
         "generated_at": _now_iso(),
@@ -162,107 +240,196 @@ def tag_summary(actor, start_date=None, end_date=None, staff_id=None):
 # CSV EXPORTS
 # =========================
 
-def export_tasks_summary_csv(actor, start_date=None, end_date=None, staff_id=None):
-    report = tasks_summary(actor, start_date, end_date, staff_id)
+TASK_EXPORT_COLUMNS = [
+    "id",
+    "title",
+    "description",
+    "status",
+    "priority",
+    "assigned_to",
+    "created_by",
+    "due_date",
+    "created_at",
+    "updated_at",
+]
 
-    log_audit(actor=actor, action="generate_report", entity_type="report")
+# Flush the CSV buffer to the client once it holds roughly this many bytes.
+_CSV_CHUNK_BYTES = 64 * 1024
 
-    buf = io.StringIO()
-    writer = csv.writer(buf)
 
-    for row in report["by_status"]:
-        writer.writerow([row["label"], row["count"]])
+class _CsvLine:
+    """File-like sink for csv.writer that hands back each written line."""
 
-    out = io.BytesIO(buf.getvalue().encode())
-    out.seek(0)
-    return out
+    def __init__(self):
+        self.value = ""
 
+    def write(self, text: str) -> None:
+        self.value = text
 
-def export_staff_summary_csv(actor, start_date=None, end_date=None, staff_id=None):
-    report = staff_summary(actor, start_date, end_date, staff_id)
 
-    log_audit(actor=actor, action="generate_report", entity_type="report")
+async def _iter_rows(rows):
+    for row in rows:
+        yield row
 
-    buf = io.StringIO()
-    writer = csv.writer(buf)
 
-    for row in report["items"]:
-        writer.writerow(row.values())
+async def _csv_stream(rows, header: list[str] | None = None):
+    """
+    Encode rows (an async iterable of sequences) as CSV, yielding UTF-8
+    chunks of about _CSV_CHUNK_BYTES so memory stays flat however many rows
+    the source produces.
+    """
+    line = _CsvLine()
+    writer = csv.writer(line)
+    parts: list[str] = []
+    size = 0
 
-    out = io.BytesIO(buf.getvalue().encode())
-    out.seek(0)
-    return out
+    if header:
+        writer.writerow(header)
+        yield line.value.encode()
 
+    async for row in rows:
+        writer.writerow(row)
+        parts.append(line.value)
+        size += len(line.value)
+        if size >= _CSV_CHUNK_BYTES:
+            yield "".join(parts).encode()
+            parts.clear()
+            size = 0
 
-def export_tag_summary_csv(actor, start_date=None, end_date=None, staff_id=None):
-    report = tag_summary(actor, start_date, end_date, staff_id)
+    if parts:
+        yield "".join(parts).encode()
 
-    log_audit(actor=actor, action="generate_report", entity_type="report")
 
-    buf = io.StringIO()
-    writer = csv.writer(buf)
+async def _iter_task_pages(jwt, start_date, end_date, staff_id, *, select: str):
+    """Yield every matching task row, fetched in keyset pages of EXPORT_PAGE_SIZE."""
+    params = _task_params(start_date, end_date, staff_id, select=select)
+    params["order"] = "created_at.desc,id.desc"
+    params["limit"] = settings.EXPORT_PAGE_SIZE
 
-    for row in report["items"]:
-        writer.writerow(row.values())
+    while True:
+        page = await sb_get(f"{REST}/tasks", user_jwt=jwt, params=params)
+        for row in page:
+            yield row
+        if len(page) < settings.EXPORT_PAGE_SIZE:
+            return
+        params["or"] = keyset_filter(encode_cursor(page[-1]))
 
-    out = io.BytesIO(buf.getvalue().encode())
-    out.seek(0)
-    return out
 
+async def export_tasks_summary_csv(actor, start_date=None, end_date=None, staff_id=None):
+    report = await tasks_summary(actor, start_date, end_date, staff_id)
 
-# =========================
-# PDF EXPORTS (FIXED)
-# =========================
+    await log_audit(actor=actor, action="generate_report", entity_type="report")
 
-def export_tasks_summary_pdf(actor, start_date=None, end_date=None, staff_id=None):
-    report = tasks_summary(actor, start_date, end_date, staff_id)
+    return _csv_stream(_iter_rows([row["label"], row["count"]] for row in report["by_status"]))
 
-    log_audit(actor=actor, action="generate_report", entity_type="report")
 
-    out = io.BytesIO()
-    pdf = canvas.Canvas(out, pagesize=letter)
+async def export_staff_summary_csv(actor, start_date=None, end_date=None, staff_id=None):
+    report = await staff_summary(actor, start_date, end_date, staff_id)
 
-    y = 10 * inch
-    for row in report["by_status"]:
-        pdf.drawString(1 * inch, y, f"{row['label']}: {row['count']}")
-        y -= 0.3 * inch
+    await log_audit(actor=actor, action="generate_report", entity_type="report")
 
-    pdf.save()
-    out.seek(0)
-    return out
+    # No header row, so columns are positional: the original four stay first
+    # and the directory fields are appended for existing spreadsheets.
+    return _csv_stream(
+        _iter_rows(
+            [row["staff_id"], row["total_tasks"], row["open_tasks"], row["closed_tasks"], row["full_name"], row["email"]]
+            for row in report["items"]
+        )
+    )
+
+
+async def export_tag_summary_csv(actor, start_date=None, end_date=None, staff_id=None):
+    report = await tag_summary(actor, start_date, end_date, staff_id)
 
+    await log_audit(actor=actor, action="generate_report", entity_type="report")
 
-def export_staff_summary_pdf(actor, start_date=None, end_date=None, staff_id=None):
-    report = staff_summary(actor, start_date, end_date, staff_id)
+    return _csv_stream(_iter_rows(list(row.values()) for row in report["items"]))
 
-    log_audit(actor=actor, action="generate_report", entity_type="report")
 
-    out = io.BytesIO()
-    pdf = canvas.Canvas(out, pagesize=letter)
+async def export_tasks_csv(actor, start_date=None, end_date=None, staff_id=None):
+    """
+    Task-level raw export. Authorization and the audit entry happen before the
+    first byte; rows are then streamed page by page from Supabase.
+    """
+    jwt = _admin_jwt(actor)
 
-    y = 10 * inch
-    for row in report["items"]:
-        pdf.drawString(1 * inch, y, str(row))
-        y -= 0.3 * inch
+    await log_audit(actor=actor, action="generate_report", entity_type="report", new_data={"report": "tasks"})
 
-    pdf.save()
-    out.seek(0)
-    return out
+    rows = _iter_task_pages(jwt, start_date, end_date, staff_id, select=",".join(TASK_EXPORT_COLUMNS))
 
+    async def _values():
+        async for row in rows:
+            yield [row.get(col) for col in TASK_EXPORT_COLUMNS]
 
-def export_tag_summary_pdf(actor, start_date=None, end_date=None, staff_id=None):
-    report = tag_summary(actor, start_date, end_date, staff_id)
+    return _csv_stream(_values(), header=TASK_EXPORT_COLUMNS)
 
-    log_audit(actor=actor, action="generate_report", entity_type="report")
 
-    out = io.BytesIO()
-    pdf = canvas.Canvas(out, pagesize=letter)
+# =========================
+# PDF EXPORTS
+# =========================
 
-    y = 10 * inch
-    for row in report["items"]:
-        pdf.drawString(1 * inch, y, str(row))
-        y -= 0.3 * inch
+async def render_pdf(spec: dict) -> bytes:
+    # pdf_report (and the worker pool behind it) loads on the first export,
+    # not at API startup.
+    from app.services.pdf_report import render_pdf as _render_pdf
 
-    pdf.save()
-    out.seek(0)
-    return out
\ No newline at end of file
+    return await _render_pdf(spec)
+
+
+async def export_tasks_summary_pdf(actor, start_date=None, end_date=None, staff_id=None):
+    report = await tasks_summary(actor, start_date, end_date, staff_id)
+
+    await log_audit(actor=actor, action="generate_report", entity_type="report")
+
+    data = await render_pdf(
+        {
+            "title": "Tasks Summary",
+            "generated_at": report["generated_at"],
+            "filters": report["filters"],
+            "summary": [
+                ("Total tasks", report["total_tasks"]),
+                ("Open tasks", report["open_tasks"]),
+                ("Closed tasks", report["closed_tasks"]),
+            ],
+            "columns": ["Status", "Count"],
+            "rows": [[row["label"], row["count"]] for row in report["by_status"]],
+        }
+    )
+    return io.BytesIO(data)
+
+
+async def export_staff_summary_pdf(actor, start_date=None, end_date=None, staff_id=None):
+    report = await staff_summary(actor, start_date, end_date, staff_id)
+
+    await log_audit(actor=actor, action="generate_report", entity_type="report")
+
+    data = await render_pdf(
+        {
+            "title": "Staff Summary",
+            "generated_at": report["generated_at"],
+            "filters": report["filters"],
+            "columns": ["Staff", "Staff ID", "Total", "Open", "Closed"],
+            "rows": [
+                [row["full_name"] or "", row["staff_id"], row["total_tasks"], row["open_tasks"], row["closed_tasks"]]
+                for row in report["items"]
+            ],
+        }
+    )
+    return io.BytesIO(data)
+
+
+async def export_tag_summary_pdf(actor, start_date=None, end_date=None, staff_id=None):
+    report = await tag_summary(actor, start_date, end_date, staff_id)
+
+    await log_audit(actor=actor, action="generate_report", entity_type="report")
+
+    data = await render_pdf(
+        {
+            "title": "Tag Summary",
+            "generated_at": report["generated_at"],
+            "filters": report["filters"],
+            "columns": ["Tag", "Total tasks"],
+            "rows": [[row["tag"], row["total_tasks"]] for row in report["items"]],
+        }
+    )
+    return io.BytesIO(data)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from app.core.config import settings
+from app.db.supabase_async import sb_admin_get, sb_get
+
+REST = "/rest/v1"
+
+_DIRECTORY_SELECT = "id,email,full_name,staff_code,role,department,job_title,employment_status,updated_at"
+
+# updated_at is stamped when a transaction writes, not when it commits, so a
+# row can become visible after newer ones were already read. Incremental
+# pulls re-read this much history behind the watermark to catch those.
+_WATERMARK_OVERLAP = timedelta(seconds=120)
+
+
+def _overlap_start(watermark: tuple[str, str]) -> str:
+    try:
+        return (datetime.fromisoformat(watermark[0]) - _WATERMARK_OVERLAP).isoformat()
+    except ValueError:
+        return watermark[0]
+
+
+class StaffDirectory:
+    """
+    Per-process index of profiles: email -> id and id -> profile.
+
+    Loaded on first use, then refreshed incrementally by pulling only rows
+    updated since shortly before the newest one already held. Profiles are
+    soft-deleted (the row is updated), so incremental pulls see those too; a
+    full reload every STAFF_DIRECTORY_FULL_RELOAD_SECONDS drops anything
+    removed outright. Staff routes call `invalidate` after writes so this
+    worker picks up its own changes on the next lookup.
+    """
+
+    def __init__(self) -> None:
+        self._by_id: dict[str, dict] = {}
+        self._by_email: dict[str, str] = {}
+        self._watermark: tuple[str, str] | None = None
+        self._refresh_due = 0.0
+        self._reload_due = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.full_loads = 0
+        self.incremental_loads = 0
+
+    async def _pull(self, jwt: str | None, watermark: tuple[str, str] | None) -> list[dict]:
+        params: dict[str, Any] = {
+            "select": _DIRECTORY_SELECT,
+            "order": "updated_at.asc,id.asc",
+            "limit": settings.EXPORT_PAGE_SIZE,
+        }
+        if watermark is not None:
+            params["updated_at"] = f"gte.{_overlap_start(watermark)}"
+        rows: list[dict] = []
+        since: tuple[str, str] | None = None
+        while True:
+            if since is not None:
+                updated_at, row_id = since
+                params["or"] = f'(updated_at.gt."{updated_at}",and(updated_at.eq."{updated_at}",id.gt."{row_id}"))'
+            # The directory is shared by every caller, so read it with the
+            # service key when available instead of one user's RLS view.
+            if settings.SUPABASE_SERVICE_ROLE_KEY:
+                page = await sb_admin_get(f"{REST}/profiles", params=params)
+            else:
+                page = await sb_get(f"{REST}/profiles", user_jwt=jwt, params=params)
+            rows.extend(page)
+            if len(page) < settings.EXPORT_PAGE_SIZE:
+                return rows
+            since = (page[-1]["updated_at"], page[-1]["id"])
+
+    def _index(self, rows: list[dict]) -> None:
+        for row in rows:
+            self._put(row)
+            if row.get("updated_at"):
+                mark = (row["updated_at"], row["id"])
+                if self._watermark is None or mark > self._watermark:
+                    self._watermark = mark
+
+    def _put(self, row: dict) -> None:
+        staff_id = str(row["id"])
+        previous = self._by_id.get(staff_id)
+        if previous and previous.get("email"):
+            self._by_email.pop(previous["email"].lower(), None)
+        self._by_id[staff_id] = row
+        if row.get("email"):
+            self._by_email[row["email"].lower()] = staff_id
+
+    async def ensure_fresh(self, jwt: str | None = None) -> None:
+        now = time.monotonic()
+        if now < self._refresh_due:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            if now < self._refresh_due:
+                return
+
+            if now >= self._reload_due:
+                rows = await self._pull(jwt, None)
+                self._by_id.clear()
+                self._by_email.clear()
+                self._watermark = None
+                self._index(rows)
+                self.full_loads += 1
+                self._reload_due = now + settings.STAFF_DIRECTORY_FULL_RELOAD_SECONDS
+            else:
+                self._index(await self._pull(jwt, self._watermark))
+                self.incremental_loads += 1
+
+            self._refresh_due = now + settings.STAFF_DIRECTORY_REFRESH_SECONDS
+
+    async def id_for_email(self, email: str, jwt: str | None = None) -> str | None:
+        await self.ensure_fresh(jwt)
+        staff_id = self._by_email.get(email.strip().lower())
+        if staff_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return staff_id
+
+    async def get(self, staff_id: str, jwt: str | None = None) -> dict | None:
+        await self.ensure_fresh(jwt)
+        profile = self._by_id.get(str(staff_id))
+        if profile is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return profile
+
+    def remember(self, row: dict) -> None:
+        """Add a profile fetched outside the directory (e.g. after a miss)."""
+        if row.get("id"):
+            self._put(row)
+
+    def invalidate(self, staff_id: str | None = None) -> None:
+        if staff_id is not None:
+            profile = self._by_id.pop(str(staff_id), None)
+            if profile and profile.get("email"):
+                self._by_email.pop(profile["email"].lower(), None)
+        # Next lookup pulls the changed rows; a full reload is not needed.
+        self._refresh_due = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._by_id),
+            "watermark": self._watermark[0] if self._watermark else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "full_loads": self.full_loads,
+            "incremental_loads": self.incremental_loads,
+        }
+
+
+staff_directory = StaffDirectory()
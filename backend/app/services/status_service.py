@@ -1,7 +1,12 @@
-from app.core.errors import bad_request, forbidden, not_found
-from app.db.supabase_http import sb_admin_patch, sb_admin_post, sb_get
-from app.services.task_service import normalize_status
+import asyncio
+
+from fastapi import HTTPException
+
+from app.core.errors import bad_request, error_message, forbidden, not_found
+from app.db.supabase_async import in_list, sb_admin_patch, sb_admin_post, sb_get
+from app.services.task_service import _is_uuid, normalize_status
 from app.services.audit_service import log_audit
+from app.services.report_cache import bump_data_version
 
 REST = "/rest/v1"
 
@@ -13,12 +18,12 @@ def _ensure_can_update(task: dict, actor: dict) -> None:
         forbidden("You can only update tasks assigned to you.")
 
 
-def add_status_update(task_id: str, new_status: str, note: str | None, actor: dict) -> dict:
+async def add_status_update(task_id: str, new_status: str, note: str | None, actor: dict) -> dict:
     status_value = normalize_status(new_status)
     if not status_value:
         bad_request("Status is required.")
 
-    rows = sb_get(
+    rows = await sb_get(
         f"{REST}/tasks",
         user_jwt=actor["access_token"],
         params={"select": "id,assigned_to", "id": f"eq.{task_id}", "limit": 1},
@@ -29,14 +34,14 @@ def add_status_update(task_id: str, new_status: str, note: str | None, actor: di
     task = rows[0]
     _ensure_can_update(task, actor)
 
-    sb_admin_patch(
+    await sb_admin_patch(
         f"{REST}/tasks",
         json={"status": status_value},
         params={"id": f"eq.{task_id}", "select": "id,status"},
         extra_headers={"Prefer": "return=representation"},
     )
 
-    history = sb_admin_post(
+    history = await sb_admin_post(
         f"{REST}/status_updates",
         json={
             "task_id": task_id,
@@ -51,7 +56,9 @@ def add_status_update(task_id: str, new_status: str, note: str | None, actor: di
     if not history:
         bad_request("Status update not recorded.")
 
-    log_audit(
+    bump_data_version()
+
+    await log_audit(
         actor=actor,
         action="status_update",
         entity_type="task",
@@ -61,8 +68,146 @@ def add_status_update(task_id: str, new_status: str, note: str | None, actor: di
 
     return history[0]
 
-def list_status_updates(task_id: str, actor: dict) -> list[dict]:
-    return sb_get(
+async def add_status_updates_batch(items: list[dict], actor: dict) -> list[dict]:
+    """
+    Apply many status changes with one ownership read, one PATCH per distinct
+    status, one bulk history insert and one buffered audit batch.
+
+    Returns one result per item, in order: {"index", "task_id", "ok",
+    "applied", "history", "error"}. `applied` says whether the task's status
+    was changed and `ok` whether the change and its history row were both
+    recorded. Items that fail validation, ownership or their status group's
+    PATCH are reported individually and do not block the rest.
+    """
+    task_ids = [str(item["task_id"]).strip().lower() for item in items]
+    results = [
+        {"index": i, "task_id": item["task_id"], "ok": False, "applied": False, "history": None, "error": None}
+        for i, item in enumerate(items)
+    ]
+
+    valid: list[tuple[int, str]] = []
+    for i, item in enumerate(items):
+        try:
+            # One malformed id would make PostgREST reject the whole in.() read.
+            if not _is_uuid(task_ids[i]):
+                bad_request("Invalid task id.")
+            status_value = normalize_status(item.get("status"))
+            if not status_value:
+                bad_request("Status is required.")
+        except HTTPException as exc:
+            results[i]["error"] = error_message(exc)
+            continue
+        valid.append((i, status_value))
+
+    wanted = sorted({task_ids[i] for i, _ in valid})
+    tasks_by_id: dict[str, dict] = {}
+    if wanted:
+        rows = await sb_get(
+            f"{REST}/tasks",
+            user_jwt=actor["access_token"],
+            params={"select": "id,assigned_to", "id": in_list(wanted)},
+        )
+        tasks_by_id = {str(row["id"]).lower(): row for row in rows}
+
+    accepted: list[tuple[int, str]] = []
+    for i, status_value in valid:
+        task = tasks_by_id.get(task_ids[i])
+        if not task:
+            results[i]["error"] = "Task not found."
+            continue
+        try:
+            _ensure_can_update(task, actor)
+        except HTTPException as exc:
+            results[i]["error"] = error_message(exc)
+            continue
+        accepted.append((i, status_value))
+
+    if not accepted:
+        return results
+
+    # The last change per task wins; group tasks by their final status.
+    final_status: dict[str, str] = {}
+    for i, status_value in accepted:
+        final_status[task_ids[i]] = status_value
+
+    by_status: dict[str, list[str]] = {}
+    for task_id, status_value in final_status.items():
+        by_status.setdefault(status_value, []).append(task_id)
+
+    # Each group is its own PATCH, so some can succeed while others fail.
+    outcomes = await asyncio.gather(
+        *(
+            sb_admin_patch(
+                f"{REST}/tasks",
+                json={"status": status_value},
+                params={"id": in_list(ids), "select": "id"},
+                extra_headers={"Prefer": "return=minimal"},
+            )
+            for status_value, ids in by_status.items()
+        ),
+        return_exceptions=True,
+    )
+    failed: dict[str, str] = {}
+    for ids, outcome in zip(by_status.values(), outcomes):
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, Exception):
+                raise outcome
+            message = error_message(outcome) if isinstance(outcome, HTTPException) else "Status update failed."
+            failed.update((task_id, message) for task_id in ids)
+
+    applied: list[tuple[int, str]] = []
+    for i, status_value in accepted:
+        if task_ids[i] in failed:
+            results[i]["error"] = failed[task_ids[i]]
+        else:
+            results[i]["applied"] = True
+            applied.append((i, status_value))
+
+    if not applied:
+        return results
+
+    bump_data_version()
+
+    try:
+        history = await sb_admin_post(
+            f"{REST}/status_updates",
+            json=[
+                {
+                    "task_id": task_ids[i],
+                    "status": status_value,
+                    "note": items[i].get("note"),
+                    "updated_by": actor["user_id"],
+                }
+                for i, status_value in applied
+            ],
+            params={"select": "*"},
+            extra_headers={"Prefer": "return=representation"},
+        )
+    except HTTPException as exc:
+        history = []
+        missing = f"Status changed but history not recorded: {error_message(exc)}"
+    else:
+        missing = "Status changed but history not recorded."
+
+    for (i, _), row in zip(applied, history):
+        results[i].update(ok=True, history=row)
+    for i, _ in applied[len(history):]:
+        results[i]["error"] = missing
+
+    for i, status_value in applied:
+        await log_audit(
+            actor=actor,
+            action="status_update",
+            entity_type="task",
+            entity_id=task_ids[i],
+            new_data={"status": status_value, "note": items[i].get("note")},
+        )
+
+    return results
+
+
+async def list_status_updates(task_id: str, actor: dict) -> list[dict]:
+    return await sb_get(
         f"{REST}/status_updates",
         user_jwt=actor["access_token"],
         params={
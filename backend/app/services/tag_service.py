@@ -1,20 +1,21 @@
-from app.db.supabase_http import sb_get, sb_post, sb_delete
+from app.db.supabase_async import sb_get, sb_post, sb_delete
 from app.core.errors import bad_request
 from app.services.audit_service import log_audit
+from app.services.report_cache import bump_data_version
 
 REST = "/rest/v1"
 
 
-def list_tags(user_jwt: str) -> list[dict]:
-    return sb_get(
+async def list_tags(user_jwt: str) -> list[dict]:
+    return await sb_get(
         f"{REST}/tags",
         user_jwt=user_jwt,
         params={"select": "id,name,created_at", "order": "name.asc"},
     )
 
 
-def create_tag(name: str, user_jwt: str, actor: dict) -> dict:
-    rows = sb_post(
+async def create_tag(name: str, user_jwt: str, actor: dict) -> dict:
+    rows = await sb_post(
         f"{REST}/tags",
         user_jwt=user_jwt,
         json={"name": name},
@@ -25,7 +26,9 @@ def create_tag(name: str, user_jwt: str, actor: dict) -> dict:
 
     tag = rows[0]
 
-    log_audit(
+    bump_data_version()
+
+    await log_audit(
         actor=actor,
         action="create",
         entity_type="tag",
@@ -36,21 +39,23 @@ def create_tag(name: str, user_jwt: str, actor: dict) -> dict:
     return tag
 
 
-def delete_tag(tag_id: str, user_jwt: str, actor: dict) -> None:
-    old = sb_get(
+async def delete_tag(tag_id: str, user_jwt: str, actor: dict) -> None:
+    old = await sb_get(
         f"{REST}/tags",
         user_jwt=user_jwt,
         params={"id": f"eq.{tag_id}", "limit": 1},
     )
     old_data = old[0] if old else None
 
-    sb_delete(
+    await sb_delete(
         f"{REST}/tags",
         user_jwt=user_jwt,
         params={"id": f"eq.{tag_id}"},
     )
 
-    log_audit(
+    bump_data_version()
+
+    await log_audit(
         actor=actor,
         action="delete",
         entity_type="tag",
@@ -1,8 +1,18 @@
+import asyncio
+import base64
+import json
+import time
+import uuid
 from datetime import date, datetime
 
-from app.core.errors import bad_request, forbidden, not_found
-from app.db.supabase_http import sb_delete, sb_get, sb_patch, sb_post
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.errors import bad_request, error_message, forbidden, http_error, not_found
+from app.db.supabase_async import in_list, in_list_chunks, sb_delete, sb_get, sb_patch, sb_post
 from app.services.audit_service import log_audit
+from app.services.report_cache import bump_data_version
+from app.services.staff_directory import staff_directory
 
 REST = "/rest/v1"
 
@@ -22,6 +32,14 @@ _STATUS_ALIAS_MAP = {
 _ALLOWED_STATUSES = {"pending", "in_progress", "done", "on_hold", "cancelled"}
 _ALLOWED_PRIORITIES = {"Low", "Medium", "High"}
 
+# TaskOut's fields. GET /api/tasks selects exactly these so its rows can be
+# sent without re-validation (see app.core.fastjson).
+_LIST_COLUMNS = "id,title,description,assigned_to,created_by,due_date,priority,status,created_at,updated_at"
+
+_UPDATE_RPC = f"{REST}/rpc/update_task_versioned"
+_UPDATE_RPC_RETRY_SECONDS = 300
+_update_rpc_unavailable_until = 0.0
+
 
 def _normalize_due_date(value) -> str | None:
     if value in (None, ""):
@@ -60,36 +78,128 @@ def normalize_priority(value: str | None) -> str:
     return normalized
 
 
-def _resolve_staff_id(identifier: str, jwt: str) -> str:
+async def _resolve_staff_id(identifier: str, actor: dict) -> str:
     identifier = str(identifier).strip()
+    jwt = actor["access_token"]
 
-    if len(identifier) == 36 and identifier.count("-") == 4:
+    if _is_uuid(identifier):
         return identifier
 
-    rows = sb_get(
+    # The directory is read with the service key, so only admins may use it;
+    # everyone else resolves through their own RLS view of profiles.
+    is_admin = actor.get("app_role") == "admin"
+    if is_admin:
+        staff_id = await staff_directory.id_for_email(identifier, jwt)
+        if staff_id:
+            return staff_id
+
+    # Not in this worker's directory yet (e.g. invited by another worker).
+    rows = await sb_get(
         f"{REST}/profiles",
         user_jwt=jwt,
-        params={"select": "id,email", "email": f"eq.{identifier}", "limit": 1},
+        params={"select": "id,email,full_name,updated_at", "email": f"eq.{identifier}", "limit": 1},
     )
 
     if not rows:
         bad_request(f"Assigned staff not found: {identifier}")
 
+    if is_admin:
+        staff_directory.remember(rows[0])
     return rows[0]["id"]
 
 
-def list_tasks(actor: dict) -> list[dict]:
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    # Both values end up inside a quoted PostgREST or=() filter, so they are
+    # checked strictly: a crafted cursor must not add filter terms.
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at, task_id = str(created_at), str(task_id)
+        datetime.fromisoformat(created_at)
+        valid = _is_uuid(task_id)
+    except Exception:
+        valid = False
+    if not valid:
+        bad_request("Invalid cursor.")
+    return created_at, task_id
+
+
+def keyset_filter(cursor: str) -> str:
+    # Rows strictly after the cursor in (created_at desc, id desc) order.
+    created_at, task_id = decode_cursor(cursor)
+    return f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{task_id}"))'
+
+
+async def list_tasks(
+    actor: dict,
+    *,
+    limit: int = 100,
+    cursor: str | None = None,
+    status: str | None = None,
+    priority: str | None = None,
+    assigned_to: str | None = None,
+    due_from: date | None = None,
+    due_to: date | None = None,
+    tag_id: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """
+    One keyset page of tasks ordered by (created_at, id) descending.
+
+    Returns the rows and the cursor for the next page (None on the last page).
+    """
     jwt = actor["access_token"]
-    return sb_get(
-        f"{REST}/tasks",
-        user_jwt=jwt,
-        params={"select": "*", "order": "created_at.desc"},
-    )
 
+    params: dict = {
+        "select": _LIST_COLUMNS,
+        "order": "created_at.desc,id.desc",
+        # One extra row tells us whether another page exists.
+        "limit": limit + 1,
+    }
+
+    if cursor:
+        params["or"] = keyset_filter(cursor)
+    if status:
+        params["status"] = f"eq.{normalize_status(status)}"
+    if priority:
+        params["priority"] = f"eq.{normalize_priority(priority)}"
+    if assigned_to:
+        params["assigned_to"] = f"eq.{await _resolve_staff_id(assigned_to, actor)}"
+
+    due_parts = []
+    if due_from:
+        due_parts.append(f"due_date.gte.{due_from.isoformat()}")
+    if due_to:
+        due_parts.append(f"due_date.lte.{due_to.isoformat()}")
+    if due_parts:
+        params["and"] = f"({','.join(due_parts)})"
+
+    if tag_id:
+        # Inner-join task_tags so only tasks carrying the tag come back.
+        params["select"] = f"{_LIST_COLUMNS},task_tags!inner(tag_id)"
+        params["task_tags.tag_id"] = f"eq.{tag_id}"
 
-def get_task(task_id: str, actor: dict) -> dict:
+    rows = await sb_get(f"{REST}/tasks", user_jwt=jwt, params=params)
+
+    if tag_id:
+        for row in rows:
+            row.pop("task_tags", None)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+
+    return rows, next_cursor
+
+
+async def get_task(task_id: str, actor: dict) -> dict:
     jwt = actor["access_token"]
-    rows = sb_get(
+    rows = await sb_get(
         f"{REST}/tasks",
         user_jwt=jwt,
         params={"select": "*", "id": f"eq.{task_id}", "limit": 1},
@@ -99,14 +209,34 @@ def get_task(task_id: str, actor: dict) -> dict:
     return rows[0]
 
 
-def create_task(payload: dict, actor: dict) -> dict:
+def _insert_payload(payload: dict, staff_id: str, actor: dict) -> dict:
+    return {
+        "title": payload["title"].strip(),
+        "description": payload.get("description"),
+        "due_date": _normalize_due_date(payload.get("due_date")),
+        "created_by": actor["user_id"],
+        "assigned_to": staff_id,
+        "priority": normalize_priority(payload.get("priority")),
+        "status": "pending",
+    }
+
+
+def _is_uuid(identifier: str) -> bool:
+    # Canonical 8-4-4-4-12 hex only, so the value is safe inside filters.
+    try:
+        return len(identifier) == 36 and str(uuid.UUID(identifier)) == identifier.lower()
+    except ValueError:
+        return False
+
+
+async def create_task(payload: dict, actor: dict) -> dict:
     if actor.get("app_role") != "admin":
         forbidden("Admin access required.")
 
     jwt = actor["access_token"]
-    staff_id = _resolve_staff_id(payload["assigned_to"], jwt)
+    staff_id = await _resolve_staff_id(payload["assigned_to"], actor)
 
-    existing = sb_get(
+    existing = await sb_get(
         f"{REST}/tasks",
         user_jwt=jwt,
         params={
@@ -118,17 +248,9 @@ def create_task(payload: dict, actor: dict) -> dict:
     if existing:
         return existing[0]
 
-    insert_payload = {
-        "title": payload["title"].strip(),
-        "description": payload.get("description"),
-        "due_date": _normalize_due_date(payload.get("due_date")),
-        "created_by": actor["user_id"],
-        "assigned_to": staff_id,
-        "priority": normalize_priority(payload.get("priority")),
-        "status": "pending",
-    }
+    insert_payload = _insert_payload(payload, staff_id, actor)
 
-    rows = sb_post(
+    rows = await sb_post(
         f"{REST}/tasks",
         user_jwt=jwt,
         json=insert_payload,
@@ -140,7 +262,9 @@ def create_task(payload: dict, actor: dict) -> dict:
 
     task = rows[0]
 
-    log_audit(
+    bump_data_version()
+
+    await log_audit(
         actor=actor,
         action="create",
         entity_type="task",
@@ -151,12 +275,188 @@ def create_task(payload: dict, actor: dict) -> dict:
     return task
 
 
-def update_task_basic(task_id: str, patch: dict, actor: dict) -> dict:
+async def create_tasks_bulk(payloads: list[dict], actor: dict) -> list[dict]:
+    """
+    Create many tasks with a fixed number of round-trips: the assignee email
+    lookup and the duplicate-title check (each split into URL-sized chunks
+    that run concurrently), then one array insert.
+
+    Returns one result per input item, in order:
+    {"index", "status": "created" | "duplicate" | "error", "task", "error"}.
+    """
+    if actor.get("app_role") != "admin":
+        forbidden("Admin access required.")
+
+    jwt = actor["access_token"]
+    results: list[dict] = [
+        {"index": i, "status": "error", "task": None, "error": None} for i in range(len(payloads))
+    ]
+
+    # 1) Resolve every assignee email and 2) find titles this admin already
+    #    created. A full batch does not fit in one URL, so both filters are
+    #    chunked and all chunks run at once.
+    identifiers = {str(p["assigned_to"]).strip() for p in payloads}
+    emails = sorted(i for i in identifiers if not _is_uuid(i))
+    titles = sorted({p["title"].strip() for p in payloads})
+
+    email_chunks = in_list_chunks(emails)
+    pages = await asyncio.gather(
+        *(
+            sb_get(f"{REST}/profiles", user_jwt=jwt, params={"select": "id,email", "email": chunk})
+            for chunk in email_chunks
+        ),
+        *(
+            sb_get(
+                f"{REST}/tasks",
+                user_jwt=jwt,
+                params={"select": "*", "created_by": f"eq.{actor['user_id']}", "title": chunk},
+            )
+            for chunk in in_list_chunks(titles)
+        ),
+    )
+    staff_by_email = {row["email"]: row["id"] for page in pages[:len(email_chunks)] for row in page}
+    existing_by_title = {row["title"]: row for page in pages[len(email_chunks):] for row in page}
+
+    # 3) Build the insert batch, skipping duplicates (in the table or earlier
+    #    in this request) and recording per-item validation errors.
+    to_insert: list[dict] = []
+    insert_indexes: list[int] = []
+    first_index_by_title: dict[str, int] = {}
+    batch_duplicates: list[tuple[int, int]] = []
+
+    for i, payload in enumerate(payloads):
+        title = payload["title"].strip()
+        if title in existing_by_title:
+            results[i].update(status="duplicate", task=existing_by_title[title])
+            continue
+        if title in first_index_by_title:
+            batch_duplicates.append((i, first_index_by_title[title]))
+            continue
+
+        identifier = str(payload["assigned_to"]).strip()
+        staff_id = identifier if _is_uuid(identifier) else staff_by_email.get(identifier)
+        if not staff_id:
+            results[i]["error"] = f"Assigned staff not found: {identifier}"
+            continue
+
+        try:
+            row = _insert_payload(payload, staff_id, actor)
+        except HTTPException as exc:
+            results[i]["error"] = error_message(exc)
+            continue
+
+        first_index_by_title[title] = i
+        to_insert.append(row)
+        insert_indexes.append(i)
+
+    # 4) One array insert; PostgREST returns rows in input order.
+    if to_insert:
+        created = await sb_post(
+            f"{REST}/tasks",
+            user_jwt=jwt,
+            json=to_insert,
+            params={"select": "*"},
+        )
+        for i, task in zip(insert_indexes, created):
+            results[i].update(status="created", task=task)
+        for i in insert_indexes[len(created):]:
+            results[i]["error"] = "Task not created."
+
+        bump_data_version()
+
+        for i in insert_indexes:
+            task = results[i]["task"]
+            if task:
+                await log_audit(
+                    actor=actor,
+                    action="create",
+                    entity_type="task",
+                    entity_id=task["id"],
+                    new_data=task,
+                )
+
+    for i, first in batch_duplicates:
+        if results[first]["task"]:
+            results[i].update(status="duplicate", task=results[first]["task"])
+        else:
+            results[i]["error"] = results[first]["error"] or "Task not created."
+
+    return results
+
+
+def task_version(task: dict) -> str:
+    """ETag for a task row: its updated_at, which the DB trigger bumps on every write."""
+    return f'"{task.get("updated_at") or ""}"'
+
+
+def parse_if_match(value: str | None) -> str | None:
+    """Expected updated_at from an If-Match header, or None when unconditional."""
+    if value is None:
+        return None
+    value = value.strip()
+    if not value or value == "*":
+        return None
+    if "," in value:
+        bad_request("If-Match must carry a single task version.")
+    return value.removeprefix("W/").strip('"') or None
+
+
+def _version_conflict():
+    http_error(412, "PRECONDITION_FAILED", "Task was modified by someone else. Reload it and try again.")
+
+
+async def _update_task_row(task_id: str, changes: dict, actor: dict, expected: str | None) -> tuple[dict, dict]:
+    """
+    Apply `changes` to one task and return (old_row, new_row).
+
+    Uses update_task_versioned (migration 013) so the read, version check and
+    write are one round-trip. Without it, falls back to a read plus a PATCH
+    guarded on updated_at, so concurrent edits still cannot overwrite each
+    other silently.
+    """
+    global _update_rpc_unavailable_until
+
+    jwt = actor["access_token"]
+
+    if settings.TASKS_USE_UPDATE_RPC and _update_rpc_unavailable_until <= time.monotonic():
+        try:
+            result = await sb_post(
+                _UPDATE_RPC,
+                user_jwt=jwt,
+                json={"p_task_id": task_id, "p_patch": changes, "p_expected_updated_at": expected},
+            )
+        except HTTPException as exc:
+            if exc.status_code == 412:
+                _version_conflict()
+            if exc.status_code != 404:
+                raise
+            _update_rpc_unavailable_until = time.monotonic() + _UPDATE_RPC_RETRY_SECONDS
+        else:
+            if not result:
+                not_found("Task not found.")
+            return result["old"], result["new"]
+
+    old_task = await get_task(task_id, actor)
+    if expected is None:
+        expected = old_task.get("updated_at")
+
+    rows = await sb_patch(
+        f"{REST}/tasks",
+        user_jwt=jwt,
+        json=changes,
+        params={"id": f"eq.{task_id}", "updated_at": f"eq.{expected}", "select": "*"},
+    )
+    if not rows:
+        _version_conflict()
+    return old_task, rows[0]
+
+
+async def update_task_basic(task_id: str, patch: dict, actor: dict, *, if_match: str | None = None) -> dict:
     if actor.get("app_role") != "admin":
         forbidden("Admin access required.")
 
     jwt = actor["access_token"]
-    old_task = get_task(task_id, actor)
+    expected = parse_if_match(if_match)
 
     out: dict = {}
 
@@ -167,7 +467,7 @@ def update_task_basic(task_id: str, patch: dict, actor: dict) -> dict:
     if "due_date" in patch:
         out["due_date"] = _normalize_due_date(patch["due_date"])
     if "assigned_to" in patch and patch["assigned_to"] is not None:
-        out["assigned_to"] = _resolve_staff_id(patch["assigned_to"], jwt)
+        out["assigned_to"] = await _resolve_staff_id(patch["assigned_to"], actor)
     if "status" in patch:
         out["status"] = normalize_status(patch["status"])
     if "priority" in patch:
@@ -176,19 +476,11 @@ def update_task_basic(task_id: str, patch: dict, actor: dict) -> dict:
     if not out:
         bad_request("No valid fields provided.")
 
-    rows = sb_patch(
-        f"{REST}/tasks",
-        user_jwt=jwt,
-        json=out,
-        params={"id": f"eq.{task_id}", "select": "*"},
-    )
+    old_task, updated = await _update_task_row(task_id, out, actor, expected)
 
-    if not rows:
-        not_found("Task not found or not updated.")
-
-    updated = rows[0]
+    bump_data_version()
 
-    log_audit(
+    await log_audit(
         actor=actor,
         action="update",
         entity_type="task",
@@ -201,26 +493,17 @@ def update_task_basic(task_id: str, patch: dict, actor: dict) -> dict:
 
 
 # ✅ SOFT DELETE (NO REAL DELETE)
-def delete_task(task_id: str, actor: dict) -> dict:
+async def delete_task(task_id: str, actor: dict, *, if_match: str | None = None) -> dict:
     if actor.get("app_role") != "admin":
         forbidden("Admin access required.")
 
-    jwt = actor["access_token"]
-    old_task = get_task(task_id, actor)
-
-    rows = sb_patch(
-        f"{REST}/tasks",
-        user_jwt=jwt,
-        json={"status": "cancelled"},
-        params={"id": f"eq.{task_id}", "select": "*"},
+    old_task, updated = await _update_task_row(
+        task_id, {"status": "cancelled"}, actor, parse_if_match(if_match)
     )
 
-    if not rows:
-        not_found("Task not found.")
-
-    updated = rows[0]
+    bump_data_version()
 
-    log_audit(
+    await log_audit(
         actor=actor,
         action="delete",
         entity_type="task",
@@ -232,36 +515,77 @@ def delete_task(task_id: str, actor: dict) -> dict:
     return updated
 
 
-def set_task_tags(task_id: str, tag_ids: list[str], actor: dict) -> dict:
+async def set_task_tags(task_id: str, tag_ids: list[str], actor: dict) -> dict:
     if actor.get("app_role") != "admin":
         forbidden("Only admin can modify task tags.")
 
     jwt = actor["access_token"]
-    _ = get_task(task_id, actor)
 
-    sb_delete(
-        f"{REST}/task_tags",
+    # One read both checks the task is visible and returns its current links.
+    rows = await sb_get(
+        f"{REST}/tasks",
         user_jwt=jwt,
-        params={"task_id": f"eq.{task_id}"},
+        params={"select": "id,task_tags(tag_id)", "id": f"eq.{task_id}", "limit": 1},
     )
+    if not rows:
+        not_found("Task not found.")
+
+    current = {str(link["tag_id"]) for link in rows[0].get("task_tags") or []}
+    clean_tag_ids = list(dict.fromkeys(str(tag_id).strip() for tag_id in tag_ids if str(tag_id).strip()))
+
+    to_add = [tid for tid in clean_tag_ids if tid not in current]
+    to_remove = sorted(current.difference(clean_tag_ids))
 
-    clean_tag_ids = [tag_id for tag_id in tag_ids if str(tag_id).strip()]
+    if not to_add and not to_remove:
+        return {"ok": True, "task_id": task_id, "tag_ids": clean_tag_ids}
 
-    if clean_tag_ids:
-        payload = [{"task_id": task_id, "tag_id": tid} for tid in clean_tag_ids]
-        sb_post(
+    # Only the delta is written, so unchanged links (and their index entries)
+    # are left alone and the task never passes through a "no tags" state.
+    # There is no transaction across the two calls, so they run in order: a
+    # failed insert changes nothing, and a failed delete after it is reported
+    # as a partial update with the tag set the task actually has.
+    if to_add:
+        await sb_post(
             f"{REST}/task_tags",
             user_jwt=jwt,
-            json=payload,
-            params={"select": "task_id,tag_id"},
+            json=[{"task_id": task_id, "tag_id": tid} for tid in to_add],
+            extra_headers={"Prefer": "return=minimal"},
         )
 
-    log_audit(
+    remove_error: HTTPException | None = None
+    if to_remove:
+        try:
+            await sb_delete(
+                f"{REST}/task_tags",
+                user_jwt=jwt,
+                params={"task_id": f"eq.{task_id}", "tag_id": in_list(to_remove)},
+                extra_headers={"Prefer": "return=minimal"},
+            )
+        except HTTPException as exc:
+            if not to_add:
+                raise  # nothing was written
+            remove_error = exc
+
+    removed = [] if remove_error else to_remove
+    applied = sorted(current.union(to_add).difference(removed))
+
+    bump_data_version()
+
+    await log_audit(
         actor=actor,
         action="update_tags",
         entity_type="task",
         entity_id=task_id,
-        new_data={"tag_ids": clean_tag_ids},
+        old_data={"tag_ids": sorted(current)},
+        new_data={"tag_ids": applied, "added": to_add, "removed": removed},
     )
 
-    return {"ok": True, "task_id": task_id, "tag_ids": clean_tag_ids}
\ No newline at end of file
+    if remove_error is not None:
+        http_error(
+            remove_error.status_code,
+            "TAGS_PARTIALLY_UPDATED",
+            f"Tags were added but could not be removed ({error_message(remove_error)}). "
+            f"Current tags: {', '.join(applied) or 'none'}.",
+        )
+
+    return {"ok": True, "task_id": task_id, "tag_ids": clean_tag_ids}
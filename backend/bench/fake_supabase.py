@@ -0,0 +1,505 @@
+"""
+In-process stand-in for the parts of Supabase this API talks to.
+
+Implements enough of PostgREST for the app's queries: column and embedded
+selects (`tags(name)`, `task_tags!inner(tag_id)`), `eq/neq/gt/gte/lt/lte/
+in/is/like/ilike` filters, `and=()`/`or=()` logic trees, embedded filters
+(`tasks.status=eq.done`), `order`, `limit`/`offset`, the `Prefer` headers
+(`return=minimal|representation`, `resolution=merge-duplicates`) and the
+RPCs from migrations 011 and 013. The Auth side serves a JWKS document for
+test signing keys and accepts invites/user deletes.
+
+URLs over MAX_URL_LENGTH get a 414, as from a real gateway. RLS is not
+modelled: every caller sees every row. Plug it into httpx with
+`FakeSupabase.transport()` (sync) or `FakeSupabase.async_transport()`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fnmatch
+import json
+import operator
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from urllib.parse import unquote
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import jwk, jwt
+
+# parent table -> embedded name -> (cardinality, local column, remote column)
+RELATIONS: dict[str, dict[str, tuple[str, str, str]]] = {
+    "tasks": {
+        "task_tags": ("many", "id", "task_id"),
+        "status_updates": ("many", "id", "task_id"),
+    },
+    "task_tags": {
+        "tags": ("one", "tag_id", "id"),
+        "tasks": ("one", "task_id", "id"),
+    },
+    "status_updates": {
+        "tasks": ("one", "task_id", "id"),
+    },
+}
+
+PRIMARY_KEYS: dict[str, tuple[str, ...]] = {
+    "task_tags": ("task_id", "tag_id"),
+}
+UNIQUE_KEYS: dict[str, tuple[str, ...]] = {
+    "tags": ("name",),
+}
+TIMESTAMPED = {"tasks", "profiles"}
+# Supabase's gateway (like most proxies) rejects longer request lines.
+MAX_URL_LENGTH = 8192
+DEFAULTS: dict[str, dict[str, Any]] = {
+    "tasks": {"status": "pending", "priority": "Medium", "description": None, "due_date": None},
+    "profiles": {"role": "staff"},
+}
+
+
+class TestSigningKey:
+    """ES256 key pair whose public half is served from the fake JWKS endpoint."""
+
+    def __init__(self, kid: str = "bench-key"):
+        self.kid = kid
+        private = ec.generate_private_key(ec.SECP256R1())
+        self._pem = private.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        public_pem = private.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode()
+        public = jwk.construct(public_pem, "ES256").to_dict()
+        self.public_jwk = {k: v.decode() if isinstance(v, bytes) else v for k, v in public.items()}
+        self.public_jwk.update({"kid": kid, "alg": "ES256", "use": "sig"})
+
+    def token(self, *, sub: str, email: str, issuer: str, audience: str = "authenticated", ttl: int = 3600) -> str:
+        now = int(time.time())
+        claims = {"sub": sub, "email": email, "iss": issuer, "aud": audience, "iat": now, "exp": now + ttl}
+        return jwt.encode(claims, self._pem, algorithm="ES256", headers={"kid": self.kid})
+
+
+# ---------------------------------------------------------------------------
+# Query parsing
+# ---------------------------------------------------------------------------
+
+def _split_top(text: str) -> list[str]:
+    """Split on commas that are not inside parentheses or double quotes."""
+    parts, depth, quoted, escaped, current = [], 0, False, False, []
+    for ch in text:
+        if escaped:
+            current.append(ch)
+            escaped = False
+            continue
+        if ch == "\\" and quoted:
+            current.append(ch)
+            escaped = True
+            continue
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    if current:
+        parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def _coerce(a: Any, b: str) -> tuple[Any, Any]:
+    if isinstance(a, bool):
+        return a, b.lower() == "true"
+    if isinstance(a, (int, float)):
+        try:
+            return a, float(b)
+        except ValueError:
+            return str(a), b
+    return str(a), b
+
+
+def _predicate(op: str, raw: str) -> Callable[[Any], bool]:
+    """Compile `op.raw` once into a test on a column value."""
+    if op == "is":
+        target = raw.lower()
+        if target == "null":
+            return lambda value: value is None
+        if target in ("true", "false"):
+            return lambda value: value is (target == "true")
+        return lambda value: False
+    if op == "in":
+        items = {_unquote(v) for v in _split_top(raw.strip()[1:-1])}
+        return lambda value: value is not None and str(value) in items
+
+    raw = _unquote(raw)
+    if op in ("like", "ilike"):
+        pattern = raw.replace("%", "*")
+        if op == "ilike":
+            pattern = pattern.lower()
+            return lambda value: value is not None and fnmatch.fnmatchcase(str(value).lower(), pattern)
+        return lambda value: value is not None and fnmatch.fnmatchcase(str(value), pattern)
+
+    compare = _OPERATORS.get(op)
+    if compare is None:
+        raise ValueError(f"unsupported operator {op}")
+
+    def check(value):
+        if value is None:
+            return False
+        left, right = _coerce(value, raw)
+        return compare(left, right)
+
+    return check
+
+
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+def _condition(expr: str) -> Callable[[dict], bool]:
+    """Compile one logic-tree item: `col.op.value`, `and(...)`, `or(...)` or `not.…`."""
+    negate = False
+    if expr.startswith("not."):
+        negate, expr = True, expr[4:]
+
+    for word in ("and", "or"):
+        if expr.startswith(word + "(") and expr.endswith(")"):
+            inner = [_condition(part) for part in _split_top(expr[len(word) + 1:-1])]
+            combine = all if word == "and" else any
+
+            def check(row, inner=inner, combine=combine):
+                return combine(c(row) for c in inner)
+
+            return (lambda row: not check(row)) if negate else check
+
+    column, op, raw = expr.split(".", 2)
+    if op == "not":
+        negate = not negate
+        op, raw = raw.split(".", 1)
+    test = _predicate(op, raw)
+    return lambda row: test(row.get(column)) != negate
+
+
+def _filter_for(key: str, value: str) -> Callable[[dict], bool]:
+    if key in ("and", "or"):
+        return _condition(f"{key}{value}")
+    return _condition(f"{key}.{value}")
+
+
+def _parse_select(text: str) -> list[tuple[str, Any]]:
+    """[(column, None) | ('*', None) | ('embed', (alias, table, inner, sub_fields))]"""
+    fields: list[tuple[str, Any]] = []
+    for part in _split_top(text or "*"):
+        if "(" in part and part.endswith(")"):
+            head, sub = part[:-1].split("(", 1)
+            alias, _, head = head.rpartition(":")
+            name, _, hint = head.partition("!")
+            fields.append(("embed", (alias or name, name, hint == "inner", _parse_select(sub))))
+        else:
+            fields.append((part.split(":")[0].split("::")[0], None))
+    return fields
+
+
+def _sort_rows(rows: list[dict], order: str) -> list[dict]:
+    for spec in reversed(_split_top(order)):
+        bits = spec.split(".")
+        column = bits[0]
+        desc = "desc" in bits[1:]
+        nulls_first = "nullsfirst" in bits[1:] or (desc and "nullslast" not in bits[1:])
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: r[column], reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ---------------------------------------------------------------------------
+# The fake service
+# ---------------------------------------------------------------------------
+
+class FakeSupabase:
+    def __init__(self, *, latency_ms: float = 0.0, signing_key: TestSigningKey | None = None):
+        self.tables: dict[str, list[dict]] = defaultdict(list)
+        self.latency = latency_ms / 1000.0
+        self.signing_key = signing_key or TestSigningKey()
+        self.calls: dict[tuple[str, str], int] = defaultdict(int)
+        self.rpcs: dict[str, Callable[[dict], Any]] = {
+            "report_task_status_counts": self._rpc_task_status_counts,
+            "report_staff_status_counts": self._rpc_staff_status_counts,
+            "update_task_versioned": self._rpc_update_task_versioned,
+        }
+        self._lock = threading.RLock()
+        self._clock = datetime.now(timezone.utc)
+
+    # -- transports ----------------------------------------------------------
+
+    def transport(self) -> httpx.MockTransport:
+        def handler(request: httpx.Request) -> httpx.Response:
+            if self.latency:
+                time.sleep(self.latency)
+            return self.handle(request)
+
+        return httpx.MockTransport(handler)
+
+    def async_transport(self) -> httpx.MockTransport:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return self.handle(request)
+
+        return httpx.MockTransport(handler)
+
+    # -- helpers -------------------------------------------------------------
+
+    def tick(self) -> str:
+        """Strictly increasing timestamps, so updated_at works as a version."""
+        with self._lock:
+            self._clock = max(self._clock + timedelta(microseconds=1), datetime.now(timezone.utc))
+            return self._clock.isoformat()
+
+    def insert(self, table: str, row: dict) -> dict:
+        stamp = self.tick()
+        full = {**DEFAULTS.get(table, {}), **row}
+        if table not in PRIMARY_KEYS:
+            full.setdefault("id", str(uuid.uuid4()))
+        full.setdefault("created_at", stamp)
+        if table in TIMESTAMPED:
+            full.setdefault("updated_at", stamp)
+        self.tables[table].append(full)
+        return full
+
+    @staticmethod
+    def _json(status: int, body: Any, headers: dict | None = None) -> httpx.Response:
+        return httpx.Response(status, content=json.dumps(body, default=str).encode(), headers={
+            "content-type": "application/json", **(headers or {})
+        })
+
+    @staticmethod
+    def _error(status: int, code: str, message: str) -> httpx.Response:
+        return FakeSupabase._json(status, {"code": code, "message": message, "details": None, "hint": None})
+
+    # -- request dispatch ----------------------------------------------------
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.calls[(request.method, path.split("?")[0])] += 1
+        if len(str(request.url)) > MAX_URL_LENGTH:
+            return self._error(414, "URI_TOO_LONG", f"Request URL is longer than {MAX_URL_LENGTH} bytes")
+
+        with self._lock:
+            if path == "/auth/v1/.well-known/jwks.json":
+                return self._json(200, {"keys": [self.signing_key.public_jwk]})
+            if path.startswith("/auth/v1/"):
+                return self._auth(request, path[len("/auth/v1/"):])
+            if path.startswith("/rest/v1/rpc/"):
+                return self._rpc(request, path.rsplit("/", 1)[1])
+            if path.startswith("/rest/v1/"):
+                return self._rest(request, unquote(path[len("/rest/v1/"):]))
+        return self._error(404, "NOT_FOUND", f"No route for {path}")
+
+    def _auth(self, request: httpx.Request, route: str) -> httpx.Response:
+        if route == "invite" and request.method == "POST":
+            body = json.loads(request.content or b"{}")
+            return self._json(200, {"id": str(uuid.uuid4()), "email": body.get("email")})
+        if route.startswith("admin/users/") and request.method == "DELETE":
+            return self._json(200, {})
+        return self._error(404, "NOT_FOUND", f"Auth route {route} not faked")
+
+    # -- PostgREST tables ----------------------------------------------------
+
+    def _matching(self, table: str, params: httpx.QueryParams) -> tuple[list[dict], dict]:
+        rows = list(self.tables.get(table, []))
+        embed_filters: dict[str, list[Callable[[dict], bool]]] = defaultdict(list)
+        for key, value in params.multi_items():
+            if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+                continue
+            if "." in key and key.split(".", 1)[0] in RELATIONS.get(table, {}):
+                embed, column = key.split(".", 1)
+                embed_filters[embed].append(_filter_for(column, value))
+                continue
+            check = _filter_for(key, value)
+            rows = [r for r in rows if check(r)]
+        return rows, embed_filters
+
+    def _shape(self, table: str, rows: list[dict], fields: list, embed_filters: dict) -> list[dict]:
+        out = []
+        for row in rows:
+            shaped: dict[str, Any] = {}
+            keep = True
+            for kind, spec in fields:
+                if kind == "*":
+                    shaped.update(row)
+                elif kind == "embed":
+                    alias, name, inner, sub_fields = spec
+                    cardinality, local, remote = RELATIONS[table][name]
+                    related = [r for r in self.tables.get(name, []) if r.get(remote) == row.get(local)]
+                    for check in embed_filters.get(alias, []):
+                        related = [r for r in related if check(r)]
+                    if inner and not related:
+                        keep = False
+                        break
+                    shaped_related = self._shape(name, related, sub_fields, {})
+                    if cardinality == "one":
+                        shaped[alias] = shaped_related[0] if shaped_related else None
+                    else:
+                        shaped[alias] = shaped_related
+                else:
+                    shaped[kind] = row.get(kind)
+            if keep:
+                out.append(shaped)
+        return out
+
+    def _rest(self, request: httpx.Request, table: str) -> httpx.Response:
+        params = request.url.params
+        prefer = request.headers.get("prefer", "")
+        select = _parse_select(params.get("select", "*"))
+
+        if request.method == "GET":
+            rows, embed_filters = self._matching(table, params)
+            rows = self._shape(table, rows, select, embed_filters)
+            if "order" in params:
+                rows = _sort_rows(rows, params["order"])
+            offset = int(params.get("offset", 0))
+            rows = rows[offset:]
+            if "limit" in params:
+                rows = rows[: int(params["limit"])]
+            return self._json(200, rows)
+
+        if request.method == "POST":
+            body = json.loads(request.content or b"null")
+            items = body if isinstance(body, list) else [body]
+            merge = "resolution=merge-duplicates" in prefer
+            conflict_cols = tuple(
+                params["on_conflict"].split(",")) if "on_conflict" in params else PRIMARY_KEYS.get(table, ("id",)
+            )
+            existing = self.tables[table]
+
+            created = []
+            for item in items:
+                key_cols = PRIMARY_KEYS.get(table) or UNIQUE_KEYS.get(table) or conflict_cols
+                for cols in {key_cols, conflict_cols}:
+                    if not all(c in item for c in cols):
+                        continue
+                    clash = next((r for r in existing if all(r.get(c) == item[c] for c in cols)), None)
+                    if clash is None:
+                        continue
+                    if merge and cols == conflict_cols:
+                        clash.update(item)
+                        if table in TIMESTAMPED:
+                            clash["updated_at"] = self.tick()
+                        created.append(clash)
+                        break
+                    return self._error(409, "23505", f"duplicate key value violates unique constraint on {table}")
+                else:
+                    created.append(self.insert(table, item))
+
+            return self._write_result(table, created, select, prefer, status=201)
+
+        if request.method == "PATCH":
+            body = json.loads(request.content or b"{}")
+            rows, _ = self._matching(table, params)
+            for row in rows:
+                row.update(body)
+                if table in TIMESTAMPED:
+                    row["updated_at"] = self.tick()
+            return self._write_result(table, rows, select, prefer, status=200)
+
+        if request.method == "DELETE":
+            rows, _ = self._matching(table, params)
+            doomed = {id(r) for r in rows}
+            self.tables[table] = [r for r in self.tables[table] if id(r) not in doomed]
+            return self._write_result(table, rows, select, prefer, status=200)
+
+        return self._error(405, "PGRST105", f"{request.method} not supported")
+
+    def _write_result(self, table: str, rows: list[dict], select: list, prefer: str, *, status: int) -> httpx.Response:
+        if "return=representation" in prefer:
+            return self._json(status, self._shape(table, rows, select, {}))
+        return httpx.Response(204 if status == 200 else status)
+
+    # -- RPCs ----------------------------------------------------------------
+
+    def _rpc(self, request: httpx.Request, name: str) -> httpx.Response:
+        fn = self.rpcs.get(name)
+        if fn is None:
+            return self._error(404, "PGRST202", f"Could not find the function public.{name}")
+        args = json.loads(request.content or b"{}")
+        try:
+            return self._json(200, fn(args))
+        except _RpcError as exc:
+            return self._error(exc.status, exc.code, str(exc))
+
+    def _report_tasks(self, args: dict) -> list[dict]:
+        start, end, staff = args.get("p_start_date"), args.get("p_end_date"), args.get("p_staff_id")
+        rows = []
+        for task in self.tables["tasks"]:
+            day = str(task.get("created_at", ""))[:10]
+            if start and day < start:
+                continue
+            if end and day > end:
+                continue
+            if staff and task.get("assigned_to") != staff:
+                continue
+            rows.append(task)
+        return rows
+
+    def _rpc_task_status_counts(self, args: dict) -> list[dict]:
+        counts: dict[str, int] = defaultdict(int)
+        for task in self._report_tasks(args):
+            counts[task.get("status")] += 1
+        return [{"status": k, "count": v} for k, v in counts.items()]
+
+    def _rpc_staff_status_counts(self, args: dict) -> list[dict]:
+        counts: dict[tuple, int] = defaultdict(int)
+        for task in self._report_tasks(args):
+            if task.get("assigned_to"):
+                counts[(task["assigned_to"], task.get("status"))] += 1
+        return [{"assigned_to": a, "status": s, "count": c} for (a, s), c in counts.items()]
+
+    def _rpc_update_task_versioned(self, args: dict) -> dict | None:
+        task = next((t for t in self.tables["tasks"] if t["id"] == args.get("p_task_id")), None)
+        if task is None:
+            return None
+        expected = args.get("p_expected_updated_at")
+        if expected and expected != task.get("updated_at"):
+            raise _RpcError(412, "PT412", "Task was modified by another request.")
+        old = dict(task)
+        task.update(args.get("p_patch") or {})
+        task["updated_at"] = self.tick()
+        return {"old": old, "new": dict(task)}
+
+
+class _RpcError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
@@ -0,0 +1,396 @@
+"""
+Benchmark the API against the in-process fake Supabase (bench.fake_supabase).
+
+Run from backend/:
+
+    python -m bench.run                          # every scenario
+    python -m bench.run -s tasks.list -s reports.tasks_summary -n 500 -c 32
+    python -m bench.run --latency-ms 15          # simulate a remote Supabase
+    python -m bench.run --json out.json          # save results
+    python -m bench.run --baseline out.json      # fail on regressions
+
+Requests go through the full ASGI stack (middleware, JWT verification with
+test keys, role lookup, services, serialization) with no network. Absolute
+numbers depend on the machine; compare runs made on the same one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Awaitable, Callable
+
+# Settings are read at import time, so the fake endpoints and keys must be in
+# the environment before any app module is imported.
+FAKE_URL = "http://fake-supabase.local"
+_STATE_DIR = tempfile.mkdtemp(prefix="libtask-bench-")
+os.environ.update(
+    {
+        "SUPABASE_URL": FAKE_URL,
+        "SUPABASE_ANON_KEY": "bench-anon-key",
+        "SUPABASE_SERVICE_ROLE_KEY": "bench-service-key",
+        "JWT_ISSUER": f"{FAKE_URL}/auth/v1",
+        "JWT_AUDIENCE": "authenticated",
+        "JWKS_CACHE_PATH": os.path.join(_STATE_DIR, "jwks.json"),
+        "AUDIT_SPILL_PATH": os.path.join(_STATE_DIR, "audit_spill.jsonl"),
+    }
+)
+
+import httpx  # noqa: E402
+
+from bench.fake_supabase import FakeSupabase  # noqa: E402
+
+STATUSES = ["pending", "in_progress", "done", "on_hold", "cancelled"]
+
+
+@dataclass
+class Result:
+    scenario: str
+    requests: int
+    errors: int
+    seconds: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    error_samples: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Fixture:
+    admin_id: str
+    admin_headers: dict
+    staff_ids: list[str]
+    staff_emails: list[str]
+    tag_ids: list[str]
+    task_ids: list[str]
+    counter: int = 0
+
+    def next(self) -> int:
+        self.counter += 1
+        return self.counter
+
+
+def seed(fake: FakeSupabase, *, tasks: int, staff: int, tags: int) -> Fixture:
+    admin = fake.insert("profiles", {"full_name": "Bench Admin", "email": "admin@bench.local", "role": "admin"})
+    staff_rows = [
+        fake.insert("profiles", {"full_name": f"Staff {i}", "email": f"staff{i}@bench.local", "role": "staff"})
+        for i in range(staff)
+    ]
+    tag_rows = [fake.insert("tags", {"name": f"tag-{i}", "created_by": admin["id"]}) for i in range(tags)]
+
+    today = date.today()
+    task_rows = []
+    for i in range(tasks):
+        task = fake.insert(
+            "tasks",
+            {
+                "title": f"Seed task {i}",
+                "description": "Seeded for benchmarking",
+                "created_by": admin["id"],
+                "assigned_to": staff_rows[i % staff]["id"],
+                "status": STATUSES[i % len(STATUSES)],
+                "priority": ("Low", "Medium", "High")[i % 3],
+                "due_date": (today + timedelta(days=i % 30)).isoformat(),
+            },
+        )
+        task_rows.append(task)
+        fake.insert("task_tags", {"task_id": task["id"], "tag_id": tag_rows[i % tags]["id"]})
+        fake.insert("status_updates", {"task_id": task["id"], "status": task["status"], "updated_by": admin["id"]})
+
+    token = fake.signing_key.token(sub=admin["id"], email=admin["email"], issuer=f"{FAKE_URL}/auth/v1")
+    return Fixture(
+        admin_id=admin["id"],
+        admin_headers={"Authorization": f"Bearer {token}"},
+        staff_ids=[r["id"] for r in staff_rows],
+        staff_emails=[r["email"] for r in staff_rows],
+        tag_ids=[r["id"] for r in tag_rows],
+        task_ids=[r["id"] for r in task_rows],
+    )
+
+
+# ---------------------------------------------------------------------------
+# Scenarios: each issues one API request and returns the response
+# ---------------------------------------------------------------------------
+
+Scenario = Callable[[httpx.AsyncClient, Fixture], Awaitable[httpx.Response]]
+
+
+async def _tasks_list(client, fx):
+    return await client.get("/api/tasks", params={"limit": 100}, headers=fx.admin_headers)
+
+
+async def _tasks_list_filtered(client, fx):
+    n = fx.next()
+    params = {"limit": 50, "status": STATUSES[n % len(STATUSES)], "tag_id": fx.tag_ids[n % len(fx.tag_ids)]}
+    return await client.get("/api/tasks", params=params, headers=fx.admin_headers)
+
+
+async def _tasks_create(client, fx):
+    n = fx.next()
+    payload = {"title": f"Bench task {n}", "assigned_to": fx.staff_emails[n % len(fx.staff_emails)]}
+    return await client.post("/api/tasks", json=payload, headers=fx.admin_headers)
+
+
+async def _tasks_bulk(client, fx):
+    # A full term-start import: the maximum batch, with long titles.
+    n = fx.next()
+    items = [
+        {
+            "title": f"Bulk import {n}-{i}: shelve and catalogue the returned reference volumes, section {i % 40}",
+            "assigned_to": fx.staff_emails[i % len(fx.staff_emails)],
+        }
+        for i in range(500)
+    ]
+    response = await client.post("/api/tasks/bulk", json={"items": items}, headers=fx.admin_headers)
+    if response.status_code < 400 and response.json()["created"] != len(items):
+        raise AssertionError(f"bulk created {response.json()['created']} of {len(items)}")
+    return response
+
+
+async def _tasks_update(client, fx):
+    n = fx.next()
+    task_id = fx.task_ids[n % len(fx.task_ids)]
+    payload = {"priority": ("Low", "Medium", "High")[n % 3]}
+    return await client.patch(f"/api/tasks/{task_id}", json=payload, headers=fx.admin_headers)
+
+
+async def _status_update(client, fx):
+    n = fx.next()
+    payload = {"task_id": fx.task_ids[n % len(fx.task_ids)], "status": STATUSES[n % 4]}
+    return await client.post("/api/status", json=payload, headers=fx.admin_headers)
+
+
+async def _status_batch(client, fx):
+    n = fx.next()
+    items = [
+        {"task_id": fx.task_ids[(n * 20 + i) % len(fx.task_ids)], "status": STATUSES[(n + i) % 4]}
+        for i in range(20)
+    ]
+    return await client.post("/api/status/batch", json={"items": items}, headers=fx.admin_headers)
+
+
+async def _reports_tasks_summary(client, fx):
+    return await client.get("/api/reports/tasks-summary", headers=fx.admin_headers)
+
+
+async def _reports_staff_summary(client, fx):
+    return await client.get("/api/reports/staff-summary", headers=fx.admin_headers)
+
+
+async def _reports_tag_summary(client, fx):
+    return await client.get("/api/reports/tag-summary", headers=fx.admin_headers)
+
+
+async def _exports_tasks_csv(client, fx):
+    return await client.get("/api/reports/tasks.csv", headers=fx.admin_headers)
+
+
+async def _exports_staff_pdf(client, fx):
+    return await client.get("/api/reports/staff-summary.pdf", headers=fx.admin_headers)
+
+
+async def _debug_profile(client, fx):
+    # A profiled full task page; its profile must attribute time to
+    # serialization, or the span is missing the JSON path actually in use.
+    headers = {**fx.admin_headers, "X-Debug-Profile": "1"}
+    response = await client.get("/api/tasks", params={"limit": 500}, headers=headers)
+    if response.status_code >= 400:
+        return response
+    profile = await client.get(f"/api/debug/profiles/{response.headers['x-profile-id']}", headers=fx.admin_headers)
+    summary = profile.json()
+    if summary["cprofile"] and not summary["spans"].get("serialization", {}).get("ms"):
+        raise AssertionError(f"profile {summary['id']} has no serialization time: {summary['spans']}")
+    suffix = ".prof" if summary["cprofile"] else ".txt"
+    return await client.get(f"/api/debug/profiles/{summary['id']}{suffix}", headers=fx.admin_headers)
+
+
+_ID_IN_LABEL = re.compile(r'route="[^"]*(?:[0-9a-f]{12}|[0-9a-f]{8}-[0-9a-f]{4})')
+
+
+async def _metrics_scrape(client, fx):
+    # Route labels must be templates; an id in one means unbounded cardinality.
+    response = await client.get("/api/metrics", headers=fx.admin_headers)
+    leaked = _ID_IN_LABEL.search(response.text)
+    if leaked:
+        raise AssertionError(f"id in a route label: {leaked.group(0)}")
+    return response
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "tasks.list": _tasks_list,
+    "tasks.list_filtered": _tasks_list_filtered,
+    "tasks.create": _tasks_create,
+    "tasks.bulk": _tasks_bulk,
+    "tasks.update": _tasks_update,
+    "status.update": _status_update,
+    "status.batch": _status_batch,
+    "reports.tasks_summary": _reports_tasks_summary,
+    "reports.staff_summary": _reports_staff_summary,
+    "reports.tag_summary": _reports_tag_summary,
+    "exports.tasks_csv": _exports_tasks_csv,
+    "exports.staff_pdf": _exports_staff_pdf,
+    "debug.profile": _debug_profile,
+    "metrics.scrape": _metrics_scrape,
+}
+
+# Heavy scenarios get fewer iterations by default.
+_REQUEST_SCALE = {"tasks.bulk": 0.05, "exports.tasks_csv": 0.1, "exports.staff_pdf": 0.05, "status.batch": 0.25, "debug.profile": 0.1}
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+async def run_scenario(name: str, client, fx: Fixture, *, requests: int, concurrency: int, warmup: int) -> Result:
+    scenario = SCENARIOS[name]
+    for _ in range(warmup):
+        await scenario(client, fx)
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    queue = iter(range(requests))
+
+    async def worker():
+        for _ in queue:
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, fx)
+                ok = response.status_code < 400
+                detail = f"{response.status_code} {response.text[:160]}"
+            except Exception as exc:  # keep going; report it as an error
+                ok, detail = False, repr(exc)
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors.append(detail)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return Result(
+        scenario=name,
+        requests=len(latencies),
+        errors=len(errors),
+        seconds=round(elapsed, 3),
+        rps=round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        p50_ms=round(_percentile(ordered, 50) * 1000, 2),
+        p95_ms=round(_percentile(ordered, 95) * 1000, 2),
+        p99_ms=round(_percentile(ordered, 99) * 1000, 2),
+        mean_ms=round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+        error_samples=errors[:3],
+    )
+
+
+async def run(args) -> list[Result]:
+    import app.db.supabase_async as supabase_async
+    import app.db.supabase_http as supabase_http
+    from app.main import create_app
+
+    fake = FakeSupabase(latency_ms=args.latency_ms)
+    fx = seed(fake, tasks=args.tasks, staff=args.staff, tags=args.tags)
+
+    # Pre-open the pools on the fake transport; init_*_client keeps an open client.
+    supabase_async._client = httpx.AsyncClient(transport=fake.async_transport())
+    supabase_http._client = httpx.Client(transport=fake.transport())
+
+    app = create_app()
+    results = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for name in args.scenarios or list(SCENARIOS):
+                count = max(1, int(args.requests * _REQUEST_SCALE.get(name, 1.0)))
+                result = await run_scenario(
+                    name,
+                    client,
+                    fx,
+                    requests=count,
+                    concurrency=min(args.concurrency, count),
+                    warmup=args.warmup,
+                )
+                results.append(result)
+                print(_format_row(result), flush=True)
+    return results
+
+
+def _format_header() -> str:
+    return f"{'scenario':<24}{'reqs':>7}{'errs':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+
+
+def _format_row(r: Result) -> str:
+    return f"{r.scenario:<24}{r.requests:>7}{r.errors:>6}{r.rps:>10}{r.p50_ms:>10}{r.p95_ms:>10}{r.p99_ms:>10}"
+
+
+def compare(results: list[Result], baseline_path: str, max_regression: float) -> list[str]:
+    """Scenarios whose p95 grew, or whose RPS fell, by more than max_regression."""
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = {row["scenario"]: row for row in json.load(fh)["results"]}
+
+    problems = []
+    for r in results:
+        base = baseline.get(r.scenario)
+        if not base:
+            continue
+        if base["p95_ms"] and r.p95_ms > base["p95_ms"] * (1 + max_regression):
+            problems.append(f"{r.scenario}: p95 {base['p95_ms']}ms -> {r.p95_ms}ms")
+        if base["rps"] and r.rps < base["rps"] * (1 - max_regression):
+            problems.append(f"{r.scenario}: rps {base['rps']} -> {r.rps}")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--scenario", dest="scenarios", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("-n", "--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated Supabase latency per call")
+    parser.add_argument("--tasks", type=int, default=2000, help="seeded tasks")
+    parser.add_argument("--staff", type=int, default=25)
+    parser.add_argument("--tags", type=int, default=10)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed fractional slowdown")
+    args = parser.parse_args(argv)
+
+    print(_format_header())
+    results = asyncio.run(run(args))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"config": vars(args), "results": [asdict(r) for r in results]}, fh, indent=2)
+
+    failed = [r for r in results if r.errors]
+    for r in failed:
+        print(f"\n{r.scenario}: {r.errors} errors, e.g. {r.error_samples[0]}", file=sys.stderr)
+
+    if args.baseline:
+        problems = compare(results, args.baseline, args.max_regression)
+        for line in problems:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if problems:
+            return 1
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Cold-start report for the API process: how long `import app.main` (module
+imports plus create_app) takes in a fresh interpreter, and where that time
+goes per package and per app module (from `python -X importtime`).
+
+Run from backend/:
+
+    python -m bench.startup                      # exit 1 when over DEFAULT_BUDGET_MS
+    python -m bench.startup --budget-ms 900      # tighter budget
+    python -m bench.startup --budget-ms 0        # report only
+    python -m bench.startup --json startup.json
+
+CI runs this on every push (.github/workflows/backend.yml).
+
+Each run is a new process, so the best of --runs is reported to smooth out
+noise. The lifespan warmup is not included; it is bounded separately by
+STARTUP_WARMUP_TIMEOUT_SECONDS.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# ~570 ms on a developer laptop (mostly fastapi, pydantic and httpx imports);
+# the headroom absorbs slower CI runners. Lower it when cold start improves.
+DEFAULT_BUDGET_MS = 1500.0
+
+_CHILD = """
+import json, time
+started = time.perf_counter()
+import app.main
+print(json.dumps({"wall_ms": (time.perf_counter() - started) * 1000}))
+"""
+
+
+def _parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for each `import time:` line."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        modules.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return modules
+
+
+def measure_once() -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD],
+        cwd=BACKEND_DIR,
+        # Any non-empty PYTHONDONTWRITEBYTECODE disables .pyc writing, which
+        # would make every run pay for compilation.
+        env={k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"},
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import app.main failed:\n{proc.stderr[-2000:]}")
+
+    wall_ms = json.loads(proc.stdout.strip().splitlines()[-1])["wall_ms"]
+    modules = _parse_importtime(proc.stderr)
+
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+    app_modules = {name: cumulative for name, _, cumulative in modules if name == "app" or name.startswith("app.")}
+
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "modules": len(modules),
+        "packages_ms": {name: round(us / 1000, 1) for name, us in by_package.items()},
+        "app_modules_ms": {name: round(us / 1000, 1) for name, us in app_modules.items()},
+    }
+
+
+def _print_table(title: str, values: dict[str, float], top: int) -> None:
+    print(f"\n{title}")
+    for name, ms in sorted(values.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"  {name:<45} {ms:>8.1f} ms")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="rows per table")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help="fail when the best cold start exceeds this (0 disables)",
+    )
+    parser.add_argument("--json", help="write the best run to this file")
+    args = parser.parse_args(argv)
+
+    runs = [measure_once() for _ in range(max(1, args.runs))]
+    best = min(runs, key=lambda r: r["wall_ms"])
+
+    print(f"cold start (import app.main): best {best['wall_ms']:.1f} ms of {len(runs)} runs, {best['modules']} modules")
+    print("  all runs: " + ", ".join(f"{r['wall_ms']:.1f}" for r in runs))
+    _print_table("import time by package (self)", best["packages_ms"], args.top)
+    _print_table("app modules (cumulative, includes their imports)", best["app_modules_ms"], args.top)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"runs": [r["wall_ms"] for r in runs], **best}, fh, indent=2)
+
+    if args.budget_ms > 0 and best["wall_ms"] > args.budget_ms:
+        print(f"\nFAIL: cold start {best['wall_ms']:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+-- 011_report_aggregates.sql
+-- Grouped counts for the report endpoints so the API no longer pulls every
+-- task row over HTTP. Functions run as the caller (security invoker), so
+-- the existing tasks RLS policies still decide which rows are counted.
+-- Dates bound created_at as a half-open range (not created_at::date) so the
+-- created_at indexes apply and the bounds match the PostgREST fallback's
+-- created_at.gte / created_at.lt filters. Safe to re-run.
+begin;
+
+create or replace function public.report_task_status_counts(
+  p_start_date date default null,
+  p_end_date date default null,
+  p_staff_id uuid default null
+)
+returns table (status text, count bigint)
+language sql
+stable
+as $$
+  select t.status, count(*)::bigint
+  from public.tasks t
+  where (p_start_date is null or t.created_at >= p_start_date)
+    and (p_end_date is null or t.created_at < p_end_date + 1)
+    and (p_staff_id is null or t.assigned_to = p_staff_id)
+  group by t.status;
+$$;
+
+create or replace function public.report_staff_status_counts(
+  p_start_date date default null,
+  p_end_date date default null,
+  p_staff_id uuid default null
+)
+returns table (assigned_to uuid, status text, count bigint)
+language sql
+stable
+as $$
+  select t.assigned_to, t.status, count(*)::bigint
+  from public.tasks t
+  where t.assigned_to is not null
+    and (p_start_date is null or t.created_at >= p_start_date)
+    and (p_end_date is null or t.created_at < p_end_date + 1)
+    and (p_staff_id is null or t.assigned_to = p_staff_id)
+  group by t.assigned_to, t.status;
+$$;
+
+grant execute on function public.report_task_status_counts(date, date, uuid) to authenticated;
+grant execute on function public.report_staff_status_counts(date, date, uuid) to authenticated;
+
+-- Date-range filters on created_at combined with assignee/status grouping.
+create index if not exists idx_tasks_assigned_status_created
+  on public.tasks(assigned_to, status, created_at);
+
+commit;
@@ -0,0 +1,11 @@
+-- 012_tasks_keyset_indexes.sql
+-- Support keyset pagination on (created_at, id) and the task list filters.
+begin;
+
+create index if not exists idx_tasks_created_at_id
+  on public.tasks(created_at desc, id desc);
+
+create index if not exists idx_tasks_due_date
+  on public.tasks(due_date);
+
+commit;
@@ -0,0 +1,56 @@
+-- 013_task_versioned_update.sql
+-- Single-call task update used by PATCH/DELETE /api/tasks/{id}. Locks the
+-- row, checks the caller's version (updated_at) and applies the patch in one
+-- statement, returning both the old and new rows for the audit log. A stale
+-- version raises SQLSTATE PT412, which PostgREST turns into HTTP 412.
+-- Runs as the caller (security invoker), so tasks RLS still applies.
+begin;
+
+create or replace function public.update_task_versioned(
+  p_task_id uuid,
+  p_patch jsonb,
+  p_expected_updated_at timestamptz default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_old public.tasks;
+  v_new public.tasks;
+begin
+  select * into v_old
+  from public.tasks
+  where id = p_task_id
+  for update;
+
+  if not found then
+    return null;
+  end if;
+
+  if p_expected_updated_at is not null and v_old.updated_at <> p_expected_updated_at then
+    raise exception 'Task was modified by another request.'
+      using errcode = 'PT412', detail = v_old.updated_at::text;
+  end if;
+
+  update public.tasks t
+     set title = r.title,
+         description = r.description,
+         due_date = r.due_date,
+         assigned_to = r.assigned_to,
+         status = r.status,
+         priority = r.priority
+    from jsonb_populate_record(v_old, p_patch) r
+   where t.id = p_task_id
+  returning t.* into v_new;
+
+  if not found then
+    return null;
+  end if;
+
+  return jsonb_build_object('old', to_jsonb(v_old), 'new', to_jsonb(v_new));
+end;
+$$;
+
+grant execute on function public.update_task_versioned(uuid, jsonb, timestamptz) to authenticated;
+
+commit;
@@ -132,10 +132,12 @@ export const apiPut = <T,>(path: string, body?: unknown) =>
     body: body !== undefined ? JSON.stringify(body) : undefined,
   });
 
-export const apiPatch = <T,>(path: string, body?: unknown) =>
+export const apiPatch = <T,>(path: string, body?: unknown, headers?: HeadersInit) =>
   apiFetch<T>(path, {
     method: "PATCH",
     body: body !== undefined ? JSON.stringify(body) : undefined,
+    headers,
   });
 
-export const apiDelete = <T,>(path: string) => apiFetch<T>(path, { method: "DELETE" });
+export const apiDelete = <T,>(path: string, headers?: HeadersInit) =>
+  apiFetch<T>(path, { method: "DELETE", headers });
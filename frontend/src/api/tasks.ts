@@ -1,4 +1,4 @@
-import { apiGet, apiPatch, apiPost, apiPut } from "./http";
+import { apiDelete, apiGet, apiPatch, apiPost, apiPut } from "./http";
 import type { TaskRecord } from "../types/task";
 
 export type Task = TaskRecord & {
@@ -6,7 +6,18 @@ export type Task = TaskRecord & {
   priority?: "Low" | "Medium" | "High" | string;
 };
 
-export type TaskListOut = { items: Task[] };
+export type TaskListOut = { items: Task[]; next_cursor?: string | null };
+
+export type TaskListQuery = {
+  limit?: number;
+  cursor?: string;
+  status?: string;
+  priority?: string;
+  assigned_to?: string;
+  due_from?: string;
+  due_to?: string;
+  tag_id?: string;
+};
 
 export type CreateTaskInput = {
   title: string;
@@ -20,8 +31,25 @@ export type UpdateTaskInput = Partial<Pick<Task, "title" | "description" | "assi
   due_date?: string | null;
 };
 
-export async function listTasks(): Promise<TaskListOut> {
-  return apiGet<TaskListOut>("/tasks");
+export async function listTasksPage(q?: TaskListQuery): Promise<TaskListOut> {
+  const params = new URLSearchParams();
+  for (const [key, value] of Object.entries(q ?? {})) {
+    if (value !== undefined && value !== null && value !== "") params.set(key, String(value));
+  }
+  const serialized = params.toString();
+  return apiGet<TaskListOut>(`/tasks${serialized ? `?${serialized}` : ""}`);
+}
+
+/** Fetches every page (follows next_cursor) for screens that need the full list. */
+export async function listTasks(q?: Omit<TaskListQuery, "cursor">): Promise<TaskListOut> {
+  const items: Task[] = [];
+  let cursor: string | undefined;
+  do {
+    const page = await listTasksPage({ ...q, cursor });
+    items.push(...page.items);
+    cursor = page.next_cursor ?? undefined;
+  } while (cursor);
+  return { items };
 }
 
 export async function getTask(taskId: string): Promise<Task> {
@@ -32,8 +60,36 @@ export async function createTask(payload: CreateTaskInput): Promise<Task> {
   return apiPost<Task>("/tasks", payload);
 }
 
-export async function patchTask(taskId: string, payload: UpdateTaskInput): Promise<Task> {
-  return apiPatch<Task>(`/tasks/${encodeURIComponent(taskId)}`, payload);
+export type BulkTaskResult = {
+  index: number;
+  status: "created" | "duplicate" | "error";
+  task: Task | null;
+  error: string | null;
+};
+
+export type BulkTaskOut = {
+  created: number;
+  duplicates: number;
+  failed: number;
+  results: BulkTaskResult[];
+};
+
+export async function createTasksBulk(items: CreateTaskInput[]): Promise<BulkTaskOut> {
+  return apiPost<BulkTaskOut>("/tasks/bulk", { items });
+}
+
+// Pass the task's updated_at as `version` to get a 412 instead of
+// overwriting someone else's concurrent edit.
+function ifMatch(version?: string | null): HeadersInit | undefined {
+  return version ? { "If-Match": `"${version}"` } : undefined;
+}
+
+export async function patchTask(taskId: string, payload: UpdateTaskInput, version?: string | null): Promise<Task> {
+  return apiPatch<Task>(`/tasks/${encodeURIComponent(taskId)}`, payload, ifMatch(version));
+}
+
+export async function deleteTask(taskId: string, version?: string | null): Promise<Task> {
+  return apiDelete<Task>(`/tasks/${encodeURIComponent(taskId)}`, ifMatch(version));
 }
 
 export async function setTaskTags(taskId: string, tagIds: string[]) {